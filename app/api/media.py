@@ -0,0 +1,24 @@
+from fastapi import APIRouter, HTTPException, Request, status
+
+from app.utils.media import resolve_media_path, media_response
+
+router = APIRouter()
+
+
+@router.api_route("/media/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+def servir_media(path: str, request: Request):
+    """Servir archivos de UPLOAD_FOLDER con ETag, Last-Modified, Range y 304"""
+    full_path = resolve_media_path(path)
+    if full_path is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archivo no encontrado"
+        )
+
+    try:
+        return media_response(full_path, request.headers)
+    except (FileNotFoundError, NotADirectoryError):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Archivo no encontrado"
+        )
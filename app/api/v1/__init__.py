@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from app.api.v1.endpoints import auth, usuarios, productos, trabajos, ventas, gastos, dashboard
+from app.api.v1.endpoints import auth, usuarios, productos, trabajos, ventas, gastos, dashboard, reportes
 
 api_router = APIRouter()
 
@@ -10,3 +10,4 @@ api_router.include_router(trabajos.router, prefix="/trabajos", tags=["Trabajos"]
 api_router.include_router(ventas.router, prefix="/ventas", tags=["Ventas"])
 api_router.include_router(gastos.router, prefix="/gastos", tags=["Gastos"])
 api_router.include_router(dashboard.router, prefix="/dashboard", tags=["Dashboard"])
+api_router.include_router(reportes.router, prefix="/reportes", tags=["Reportes"])
@@ -7,6 +7,7 @@ from app.core.database import get_db
 from app.core.security import verify_password, get_password_hash, create_access_token
 from app.core.config import settings
 from app.core.deps import get_current_user
+from app.core.directorio import invalidate_directorio
 from app.models.usuario import Usuario
 from app.schemas.usuario import UsuarioCreate, UsuarioLogin, Token, UsuarioResponse
 
@@ -36,6 +37,7 @@ def registro(usuario_data: UsuarioCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    invalidate_directorio()
     
     return new_user
 
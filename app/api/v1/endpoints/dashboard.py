@@ -1,15 +1,23 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+
+from fastapi import APIRouter, Depends, status
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta, date
 
+from app.core.catalog import catalog_cache
+from app.core.directorio import directorio_cache
 from app.core.database import get_db
+from app.core.jobs import encolar
 from app.core.deps import get_admin_user, get_mecanico_user, get_cliente_user
 from app.models.usuario import Usuario
 from app.models.producto import Producto
 from app.models.trabajo import Trabajo
 from app.models.venta import Venta
 from app.models.gasto import Gasto
+from app.models.archivo import TrabajoArchivo, VentaArchivo
+from app.utils.archivo import archivar, cortes  # noqa: F401 (registra la tarea)
+from app.utils.reportes import reportes_cache
 
 router = APIRouter()
 
@@ -20,12 +28,13 @@ def dashboard_admin(
     current_user: Usuario = Depends(get_admin_user)
 ):
     """Dashboard completo para administrador"""
-    # Estadísticas generales
+    # Estadísticas generales (incluye lo archivado, contado al archivar)
+    archivo = cortes(db)
     stats = {
         "usuarios": db.query(Usuario).count(),
         "productos": db.query(Producto).count(),
-        "trabajos": db.query(Trabajo).count(),
-        "ventas": db.query(Venta).count()
+        "trabajos": db.query(Trabajo).count() + (archivo["trabajo"].filas if "trabajo" in archivo else 0),
+        "ventas": db.query(Venta).count() + (archivo["venta"].filas if "venta" in archivo else 0)
     }
     
     # Conteo por rol
@@ -96,6 +105,14 @@ def dashboard_mecanico(
         "pagados": len([t for t in trabajos if t.estado == "pagado"])
     }
     
+    # Trabajos archivados del mecánico (todos pagados)
+    if "trabajo" in cortes(db):
+        archivados = db.query(func.count(TrabajoArchivo.id)).filter(
+            TrabajoArchivo.mecanico_id == current_user.id
+        ).scalar()
+        stats["total"] += archivados
+        stats["pagados"] += archivados
+    
     return {
         "stats": stats,
         "trabajos_recientes": trabajos[:10]
@@ -107,25 +124,79 @@ def dashboard_usuario(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_cliente_user)
 ):
-    """Dashboard para usuario/cliente"""
-    # Trabajos del cliente
-    trabajos = db.query(Trabajo).filter(
-        Trabajo.cliente_id == current_user.id
-    ).all()
+    """Dashboard para usuario/cliente (el detalle está en /usuarios/{id}/historial)"""
+    # Trabajos del cliente por estado
+    por_estado = dict(
+        db.query(Trabajo.estado, func.count(Trabajo.id))
+        .filter(Trabajo.cliente_id == current_user.id)
+        .group_by(Trabajo.estado)
+        .all()
+    )
     
     # Compras del cliente
-    compras = db.query(Venta).filter(
+    total_compras, monto_total = db.query(func.count(Venta.id), func.coalesce(func.sum(Venta.total), 0)).filter(
         Venta.cliente_id == current_user.id
-    ).all()
+    ).one()
+    
+    total_trabajos = sum(por_estado.values())
+    
+    # Histórico archivado del cliente
+    archivo = cortes(db)
+    if "trabajo" in archivo:
+        total_trabajos += db.query(func.count(TrabajoArchivo.id)).filter(
+            TrabajoArchivo.cliente_id == current_user.id
+        ).scalar()
+    if "venta" in archivo:
+        n, suma = db.query(func.count(VentaArchivo.id), func.coalesce(func.sum(VentaArchivo.total), 0)).filter(
+            VentaArchivo.cliente_id == current_user.id
+        ).one()
+        total_compras += n
+        monto_total += suma
     
     return {
         "trabajos": {
-            "total": len(trabajos),
-            "pendientes": len([t for t in trabajos if t.estado == "pendiente"]),
-            "completados": len([t for t in trabajos if t.estado == "completado"])
+            "total": total_trabajos,
+            "pendientes": por_estado.get("pendiente", 0),
+            "completados": por_estado.get("completado", 0)
         },
         "compras": {
-            "total": len(compras),
-            "monto_total": sum(c.total for c in compras)
+            "total": total_compras,
+            "monto_total": monto_total
         }
     }
+
+
+@router.get("/cache")
+def estadisticas_cache(
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Estadísticas de las cachés del catálogo, de reportes y del directorio en este worker (solo admin)"""
+    return {
+        "catalogo": catalog_cache.stats(),
+        "reportes": reportes_cache.stats(),
+        "directorio": directorio_cache.stats()
+    }
+
+
+@router.get("/archivo")
+def estado_archivo(
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Hasta qué fecha y cuántas filas se archivaron por tabla (solo admin)"""
+    return {
+        tabla: {"hasta": corte.hasta, "filas": corte.filas, "actualizado": corte.actualizado}
+        for tabla, corte in cortes(db).items()
+    }
+
+
+@router.post("/archivo", status_code=status.HTTP_202_ACCEPTED)
+def archivar_antiguos(
+    meses: Optional[int] = None,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Mover a las tablas de archivo ventas y trabajos pagados de meses cerrados (solo admin)"""
+    nueva = encolar(db, "archivo.mover", {"meses": meses}, max_intentos=1)
+    db.commit()
+    return {"tarea": nueva.id}
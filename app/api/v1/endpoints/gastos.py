@@ -1,16 +1,99 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional, Tuple
 from datetime import date, datetime
+import hashlib
+import unicodedata
 
 from app.core.database import get_db
+from app.core.responses import orm_response
 from app.core.deps import get_admin_user
-from app.models.gasto import Gasto
+from app.models.gasto import Gasto, GastoHuella
 from app.models.usuario import Usuario
-from app.schemas.gasto import GastoResponse, GastoCreate, GastoUpdate
+from app.schemas.gasto import GastoResponse, GastoCreate, GastoUpdate, GastoListAdapter
+from app.utils.cierres import periodo_de, periodos_cerrados, totales_gastos, verificar_periodo_abierto
+from app.utils.importar import ResumenImportacion, formatear_error, leer_lotes, parsear_fecha, parsear_numero
 
 router = APIRouter()
 
+# Nombres habituales de columnas en extractos bancarios (normalizados)
+COLUMNAS_EXTRACTO = {
+    "fecha": ("fecha", "fecha operacion", "fecha movimiento", "fecha valor", "date"),
+    "descripcion": ("descripcion", "concepto", "detalle", "movimiento", "description"),
+    "monto": ("monto", "importe", "valor", "cargo", "debito", "amount"),
+    "categoria": ("categoria", "category"),
+}
+
+
+def _normalizar(texto: str) -> str:
+    """Minúsculas, sin tildes y con espacios simples"""
+    texto = unicodedata.normalize("NFKD", texto).encode("ascii", "ignore").decode()
+    return " ".join(texto.lower().split())
+
+
+def _mapear_columnas(cabecera: List[str], indicadas: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+    """Columna del CSV para cada campo del gasto (indicada o por nombre habitual)"""
+    por_nombre = {_normalizar(c): c for c in cabecera}
+    mapa = {}
+    for campo, alias in COLUMNAS_EXTRACTO.items():
+        if indicadas.get(campo):
+            columna = por_nombre.get(_normalizar(indicadas[campo]))
+        else:
+            columna = next((por_nombre[a] for a in alias if a in por_nombre), None)
+        if columna is None and (campo != "categoria" or indicadas.get(campo)):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"No se encontró la columna para {campo}. Columnas: {', '.join(cabecera)}"
+            )
+        mapa[campo] = columna
+    return mapa
+
+
+def _huella(gasto: GastoCreate) -> bytes:
+    """Hash del contenido de la fila (sin categoría: el mapeo puede cambiar)"""
+    contenido = f"{gasto.fecha.isoformat()}|{gasto.monto:.2f}|{_normalizar(gasto.descripcion)}"
+    return hashlib.sha256(contenido.encode()).digest()
+
+
+def _insertar_gastos(
+    db: Session,
+    filas: List[Tuple[int, GastoCreate, str]],
+    resumen: ResumenImportacion,
+    meses: set
+) -> None:
+    """Insertar un lote en una transacción, omitiendo huellas ya importadas"""
+    for intento in range(2):
+        existentes = {
+            h for (h,) in db.query(GastoHuella.huella)
+            .filter(GastoHuella.huella.in_([huella for _, _, huella in filas]))
+        }
+        nuevas = [(gasto, huella) for _, gasto, huella in filas if huella not in existentes]
+        try:
+            gastos = [Gasto(**gasto.model_dump()) for gasto, _ in nuevas]
+            db.add_all(gastos)
+            db.flush()
+            if gastos:
+                db.execute(insert(GastoHuella), [
+                    {"huella": huella, "gasto_id": g.id} for g, (_, huella) in zip(gastos, nuevas)
+                ])
+            db.commit()
+            break
+        except IntegrityError:
+            # Otra importación concurrente insertó las mismas huellas: recalcular
+            db.rollback()
+            if intento:
+                raise
+    
+    resumen.contar("creados", len(nuevas))
+    resumen.contar("duplicados", len(filas) - len(nuevas))
+    # Agregados por mes: se calculan una vez por lote, no por fila
+    for gasto, _ in nuevas:
+        meses.add(gasto.fecha.strftime("%Y-%m"))
+
 
 @router.get("/", response_model=List[GastoResponse])
 def listar_gastos(
@@ -43,7 +126,7 @@ def listar_gastos(
         query = query.filter(Gasto.categoria == categoria)
     
     gastos = query.order_by(Gasto.fecha.desc()).offset(skip).limit(limit).all()
-    return gastos
+    return orm_response(GastoListAdapter, gastos)
 
 
 @router.get("/total")
@@ -59,19 +142,11 @@ def total_gastos(
         fecha_inicio = hoy
         fecha_fin = hoy
     
-    query = db.query(Gasto)
-    
-    if fecha_inicio:
-        query = query.filter(Gasto.fecha >= fecha_inicio)
-    
-    if fecha_fin:
-        query = query.filter(Gasto.fecha <= fecha_fin)
-    
-    gastos = query.all()
-    total = sum(gasto.monto for gasto in gastos)
+    # Meses cerrados desde su cierre; el resto con COUNT/SUM en SQL
+    cantidad, total = totales_gastos(db, fecha_inicio, fecha_fin)
     
     return {
-        "cantidad_gastos": len(gastos),
+        "cantidad_gastos": cantidad,
         "total": total,
         "fecha_inicio": fecha_inicio,
         "fecha_fin": fecha_fin
@@ -88,6 +163,87 @@ def listar_categorias(
     return [c[0] for c in categorias if c[0]]
 
 
+@router.post("/importar")
+async def importar_gastos(
+    request: Request,
+    col_fecha: Optional[str] = Query(None, description="Columna de fecha (por defecto se detecta)"),
+    col_descripcion: Optional[str] = Query(None, description="Columna de descripción"),
+    col_monto: Optional[str] = Query(None, description="Columna de importe"),
+    col_categoria: Optional[str] = Query(None, description="Columna de categoría (opcional)"),
+    categoria: str = Query("banco", description="Categoría si el extracto no la trae"),
+    formato_fecha: Optional[str] = Query(None, description="Formato strptime, p. ej. %d/%m/%Y"),
+    separador: str = Query(",", max_length=1, description="Separador de columnas"),
+    separador_decimal: Literal[".", ","] = ".",
+    signo: Literal["todos", "negativos", "positivos"] = Query(
+        "todos", description="Qué importes son gastos: todos (valor absoluto), solo negativos o solo positivos"
+    ),
+    codificacion: str = Query("utf-8-sig", description="Codificación del archivo"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """
+    Importar gastos desde el CSV de un extracto bancario en streaming (solo admin).
+    Las filas ya importadas (misma huella de contenido) se omiten
+    """
+    indicadas = {
+        "fecha": col_fecha, "descripcion": col_descripcion,
+        "monto": col_monto, "categoria": col_categoria
+    }
+    resumen = ResumenImportacion()
+    meses: set = set()
+    cerrados = periodos_cerrados(db)
+    for clave in ("creados", "duplicados", "omitidos"):
+        resumen.contar(clave, 0)
+    
+    mapa = None
+    # Filas idénticas dentro del extracto son movimientos distintos: el número
+    # de aparición entra en la huella para no descartarlas
+    apariciones: Dict[bytes, int] = {}
+    
+    # Se conservan las celdas vacías: el mapa de columnas sale de las claves de la primera fila
+    async for registros in leer_lotes(request, "csv", separador=separador, encoding=codificacion, conservar_vacias=True):
+        filas = []
+        for fila, datos in registros:
+            resumen.procesadas += 1
+            if isinstance(datos, str):
+                resumen.error(fila, datos)
+                continue
+            if mapa is None:
+                mapa = _mapear_columnas(list(datos), indicadas)
+            try:
+                monto = parsear_numero(datos.get(mapa["monto"]), separador_decimal)
+                if monto is None or monto == 0 or (signo == "negativos" and monto > 0) or (signo == "positivos" and monto < 0):
+                    resumen.contar("omitidos")
+                    continue
+                gasto = GastoCreate(
+                    descripcion=datos.get(mapa["descripcion"]) or "",
+                    monto=abs(monto),
+                    categoria=(mapa["categoria"] and datos.get(mapa["categoria"])) or categoria,
+                    fecha=parsear_fecha(datos.get(mapa["fecha"]), formato_fecha)
+                )
+            except ValidationError as exc:
+                resumen.error(fila, formatear_error(exc))
+                continue
+            except ValueError as exc:
+                resumen.error(fila, str(exc))
+                continue
+            if periodo_de(gasto.fecha) in cerrados:
+                resumen.error(fila, f"El mes {periodo_de(gasto.fecha)} está cerrado")
+                continue
+            
+            base = _huella(gasto)
+            apariciones[base] = apariciones.get(base, 0) + 1
+            huella = hashlib.sha256(base + str(apariciones[base]).encode()).hexdigest()
+            filas.append((fila, gasto, huella))
+        
+        if filas:
+            await run_in_threadpool(_insertar_gastos, db, filas, resumen, meses)
+    
+    resultado = resumen.as_dict()
+    resultado["meses_afectados"] = sorted(meses)
+    return resultado
+
+
 @router.get("/{gasto_id}", response_model=GastoResponse)
 def obtener_gasto(
     gasto_id: int,
@@ -111,6 +267,7 @@ def crear_gasto(
     current_user: Usuario = Depends(get_admin_user)
 ):
     """Crear nuevo gasto (solo admin)"""
+    verificar_periodo_abierto(db, gasto_data.fecha)
     nuevo_gasto = Gasto(**gasto_data.model_dump())
     
     db.add(nuevo_gasto)
@@ -135,8 +292,13 @@ def actualizar_gasto(
             detail="Gasto no encontrado"
         )
     
+    # Ni el mes actual del gasto ni el de destino pueden estar cerrados
+    cambios = gasto_data.model_dump(exclude_unset=True)
+    verificar_periodo_abierto(db, gasto.fecha)
+    verificar_periodo_abierto(db, cambios.get("fecha"))
+    
     # Actualizar campos
-    for field, value in gasto_data.model_dump(exclude_unset=True).items():
+    for field, value in cambios.items():
         setattr(gasto, field, value)
     
     db.commit()
@@ -159,6 +321,10 @@ def eliminar_gasto(
             detail="Gasto no encontrado"
         )
     
+    verificar_periodo_abierto(db, gasto.fecha)
+    
+    # Sin huella, un extracto que lo incluya puede volver a importarlo
+    db.query(GastoHuella).filter(GastoHuella.gasto_id == gasto.id).delete(synchronize_session=False)
     db.delete(gasto)
     db.commit()
     
@@ -1,13 +1,24 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status, UploadFile, File, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import insert, update
+from sqlalchemy.exc import DBAPIError
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
+from app.core import catalog
+from app.core.catalog import catalog_etag, catalog_headers, invalidate_catalog
 from app.core.database import get_db
+from app.core.jobs import encolar
 from app.core.deps import get_admin_user, get_current_active_user
+from app.core.fields import parse_fields, parse_ids, fetch_by_ids
+from app.core.responses import orm_response
 from app.models.producto import Producto
 from app.models.usuario import Usuario
-from app.schemas.producto import ProductoResponse, ProductoCreate, ProductoUpdate
-from app.utils.files import save_upload_file
+from app.schemas.producto import ProductoResponse, ProductoCreate, ProductoUpdate, ProductoMapAdapter
+from app.utils.files import store_upload_file
+from app.utils.importar import ResumenImportacion, detectar_formato, leer_lotes
+from app.utils.images import generate_variants  # noqa: F401 (registra la tarea)
+from app.utils.uploads import cleanup_unreferenced_upload  # noqa: F401 (registra la tarea)
 
 router = APIRouter()
 
@@ -19,39 +30,129 @@ def listar_productos(
     q: Optional[str] = None,
     categoria: Optional[str] = None,
     destacado: Optional[bool] = None,
+    fields: Optional[str] = Query(None, description="Campos a incluir, separados por coma"),
+    etag: str = Depends(catalog_etag),
     db: Session = Depends(get_db)
 ):
     """Listar productos con filtros opcionales"""
-    query = db.query(Producto)
+    campos = parse_fields(fields, ProductoResponse)
+    body = catalog.listar_productos_json(db, skip, limit, q, categoria, destacado, campos)
+    return Response(content=body, media_type="application/json", headers=catalog_headers(etag))
+
+
+@router.get("/categorias", response_model=List[str])
+def listar_categorias(
+    response: Response,
+    etag: str = Depends(catalog_etag),
+    db: Session = Depends(get_db)
+):
+    """Obtener lista de categorías únicas"""
+    response.headers.update(catalog_headers(etag))
+    return catalog.listar_categorias(db)
+
+
+@router.get("/lote", response_model=Dict[int, ProductoResponse])
+def obtener_productos_lote(
+    ids: str = Query(..., description="IDs separados por coma"),
+    etag: str = Depends(catalog_etag),
+    db: Session = Depends(get_db)
+):
+    """Obtener varios productos por ID en una sola consulta (mapa id -> producto)"""
+    productos = fetch_by_ids(db, Producto, parse_ids(ids))
+    return orm_response(
+        ProductoMapAdapter,
+        {p.id: p for p in productos},
+        headers=catalog_headers(etag)
+    )
+
+
+def _upsert_productos(db: Session, filas: List[Tuple[int, ProductoCreate]], resumen: ResumenImportacion) -> None:
+    """
+    Insertar o actualizar un lote de productos usando el nombre como clave.
+    Una consulta IN para los existentes y un executemany por operación
+    """
+    # Dentro del lote gana la última fila de cada nombre
+    por_nombre = {producto.nombre: (fila, producto) for fila, producto in filas}
     
-    # Filtro por búsqueda de texto
-    if q:
-        query = query.filter(
-            (Producto.nombre.ilike(f"%{q}%")) |
-            (Producto.descripcion.ilike(f"%{q}%"))
-        )
+    # Con nombres repetidos en la tabla se actualiza el de menor id
+    existentes = {}
+    for producto_id, nombre in (
+        db.query(Producto.id, Producto.nombre)
+        .filter(Producto.nombre.in_(list(por_nombre)))
+        .order_by(Producto.id.desc())
+    ):
+        existentes[nombre] = producto_id
     
-    # Filtro por categoría
-    if categoria:
-        query = query.filter(Producto.categoria == categoria)
+    nuevos = [p.model_dump() for n, (_, p) in por_nombre.items() if n not in existentes]
+    cambios = [
+        {"id": existentes[n], **p.model_dump(exclude_unset=True)}
+        for n, (_, p) in por_nombre.items() if n in existentes
+    ]
     
-    # Filtro por destacados
-    if destacado is not None:
-        query = query.filter(Producto.destacado == destacado)
+    try:
+        if nuevos:
+            db.execute(insert(Producto), nuevos)
+        if cambios:
+            db.execute(update(Producto), cambios)
+        db.commit()
+        resumen.contar("creados", len(nuevos))
+        resumen.contar("actualizados", len(cambios))
+        return
+    except DBAPIError:
+        db.rollback()
     
-    productos = query.offset(skip).limit(limit).all()
-    return productos
+    # El lote falló en la base de datos: fila por fila para señalar las culpables
+    for nombre, (fila, producto) in por_nombre.items():
+        try:
+            if nombre in existentes:
+                db.execute(update(Producto), [{"id": existentes[nombre], **producto.model_dump(exclude_unset=True)}])
+            else:
+                db.execute(insert(Producto), [producto.model_dump()])
+            db.commit()
+            resumen.contar("actualizados" if nombre in existentes else "creados")
+        except DBAPIError as exc:
+            db.rollback()
+            resumen.error(fila, str(exc.orig)[:200])
 
 
-@router.get("/categorias", response_model=List[str])
-def listar_categorias(db: Session = Depends(get_db)):
-    """Obtener lista de categorías únicas"""
-    categorias = db.query(Producto.categoria).distinct().all()
-    return [c[0] for c in categorias if c[0]]
+@router.post("/importar")
+async def importar_productos(
+    request: Request,
+    formato: Optional[str] = Query(None, description="csv o ndjson (por defecto según Content-Type)"),
+    separador: str = Query(",", max_length=1, description="Separador de columnas CSV"),
+    codificacion: str = Query("utf-8-sig", description="Codificación del archivo"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """
+    Importar productos desde CSV (con cabecera) o NDJSON en streaming (solo admin).
+    Crea o actualiza por nombre y reporta los errores por fila. Al actualizar,
+    una celda CSV vacía o una clave ausente conserva el valor actual; para
+    vaciar un campo se envía null explícito en NDJSON
+    """
+    formato = detectar_formato(request, formato)
+    resumen = ResumenImportacion()
+    resumen.contar("creados", 0)
+    resumen.contar("actualizados", 0)
+    
+    async for registros in leer_lotes(request, formato, separador=separador, encoding=codificacion):
+        validos = resumen.validar(ProductoCreate, registros)
+        if validos:
+            await run_in_threadpool(_upsert_productos, db, validos, resumen)
+    
+    if resumen.contadores["creados"] or resumen.contadores["actualizados"]:
+        invalidate_catalog()
+    
+    return resumen.as_dict()
 
 
 @router.get("/{producto_id}", response_model=ProductoResponse)
-def obtener_producto(producto_id: int, db: Session = Depends(get_db)):
+def obtener_producto(
+    producto_id: int,
+    response: Response,
+    etag: str = Depends(catalog_etag),
+    db: Session = Depends(get_db)
+):
     """Obtener producto por ID"""
     producto = db.query(Producto).filter(Producto.id == producto_id).first()
     if not producto:
@@ -59,6 +160,7 @@ def obtener_producto(producto_id: int, db: Session = Depends(get_db)):
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Producto no encontrado"
         )
+    response.headers.update(catalog_headers(etag))
     return producto
 
 
@@ -74,6 +176,7 @@ def crear_producto(
     db.add(new_producto)
     db.commit()
     db.refresh(new_producto)
+    invalidate_catalog()
     
     return new_producto
 
@@ -99,6 +202,7 @@ def actualizar_producto(
     
     db.commit()
     db.refresh(producto)
+    invalidate_catalog()
     
     return producto
 
@@ -117,12 +221,47 @@ def eliminar_producto(
             detail="Producto no encontrado"
         )
     
+    archivo = producto.foto
     db.delete(producto)
+    # El archivo se borra solo si ningún otro registro lo usa (tarea tras el commit)
+    if archivo:
+        encolar(db, "uploads.limpiar", {"filename": archivo})
     db.commit()
+    invalidate_catalog()
     
     return None
 
 
+@router.post("/{producto_id}/foto", response_model=ProductoResponse)
+def subir_foto_producto(
+    producto_id: int,
+    foto: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Subir foto de producto (solo admin)"""
+    producto = db.query(Producto).filter(Producto.id == producto_id).first()
+    if not producto:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Producto no encontrado"
+        )
+    
+    anterior = producto.foto
+    producto.foto = store_upload_file(foto)
+    
+    # Variantes y limpieza del archivo anterior: tareas que se guardan con el commit
+    encolar(db, "imagenes.variantes", {"filename": producto.foto})
+    if anterior and anterior != producto.foto:
+        encolar(db, "uploads.limpiar", {"filename": anterior})
+    
+    db.commit()
+    db.refresh(producto)
+    invalidate_catalog()
+    
+    return producto
+
+
 @router.patch("/{producto_id}/stock", response_model=ProductoResponse)
 def actualizar_stock(
     producto_id: int,
@@ -141,5 +280,6 @@ def actualizar_stock(
     producto.stock = cantidad
     db.commit()
     db.refresh(producto)
+    invalidate_catalog()
     
     return producto
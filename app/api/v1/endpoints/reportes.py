@@ -0,0 +1,135 @@
+from datetime import date
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.deps import get_admin_user
+from app.models.cierre import CierreMensual
+from app.models.usuario import Usuario
+from app.utils.cierres import (
+    calcular_resumen, cerrar_mes, mes_siguiente, parsear_periodo, periodo_de, resumen_de_cierre
+)
+from app.utils.reportes import (
+    productividad_mecanicos, productos_top, rango_reporte, reportes_cache, version_cache
+)
+
+router = APIRouter()
+
+# Meses por consulta en /reportes/mensual
+MAX_MESES_REPORTE = 36
+
+
+def _resumen(db: Session, primer_dia: date, cierre: Optional[CierreMensual]) -> dict:
+    """Resumen congelado si el mes está cerrado; si no, calculado en vivo"""
+    if cierre is not None:
+        return resumen_de_cierre(cierre)
+    resumen = calcular_resumen(db, primer_dia)
+    resumen["cerrado"] = False
+    return resumen
+
+
+@router.get("/cierres")
+def listar_cierres(
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Meses cerrados con sus totales (solo admin)"""
+    cierres = db.query(CierreMensual).order_by(CierreMensual.periodo.desc()).all()
+    return [
+        {
+            "periodo": c.periodo,
+            "ventas_total": c.ventas_total,
+            "gastos_total": c.gastos_total,
+            "margen": c.margen,
+            "cerrado_en": c.cerrado_en,
+            "cerrado_por": c.cerrado_por
+        }
+        for c in cierres
+    ]
+
+
+@router.post("/cierres/{periodo}", status_code=status.HTTP_201_CREATED)
+def cerrar_periodo(
+    periodo: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Cerrar un mes terminado: su resumen queda congelado y sus ventas y gastos no se pueden modificar (solo admin)"""
+    cierre = cerrar_mes(db, parsear_periodo(periodo), current_user.id)
+    return resumen_de_cierre(cierre)
+
+
+@router.get("/mensual")
+def resumen_mensual_rango(
+    desde: str = Query(..., description="Primer mes (AAAA-MM)"),
+    hasta: Optional[str] = Query(None, description="Último mes (AAAA-MM, por defecto el actual)"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Resumen por mes: los cerrados se leen del cierre y solo los abiertos se calculan (solo admin)"""
+    inicio = parsear_periodo(desde)
+    fin = parsear_periodo(hasta) if hasta else date.today().replace(day=1)
+    meses = (fin.year - inicio.year) * 12 + fin.month - inicio.month + 1
+    if meses < 1 or meses > MAX_MESES_REPORTE:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El rango debe tener entre 1 y {MAX_MESES_REPORTE} meses"
+        )
+    
+    cierres = {
+        c.periodo: c for c in db.query(CierreMensual)
+        .filter(CierreMensual.periodo >= periodo_de(inicio), CierreMensual.periodo <= periodo_de(fin))
+    }
+    resumenes = []
+    dia = inicio
+    while dia <= fin:
+        resumenes.append(_resumen(db, dia, cierres.get(periodo_de(dia))))
+        dia = mes_siguiente(dia)
+    return resumenes
+
+
+@router.get("/mensual/{periodo}")
+def resumen_mensual(
+    periodo: str,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Resumen de un mes: ventas, gastos, margen, por categoría, por vendedor y trabajos completados (solo admin)"""
+    primer_dia = parsear_periodo(periodo)
+    return _resumen(db, primer_dia, db.get(CierreMensual, periodo))
+
+
+@router.get("/productos-top")
+def reporte_productos_top(
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    limite: int = Query(10, ge=1, le=100),
+    orden: Literal["cantidad", "total"] = "cantidad",
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Productos más vendidos por cantidad o importe (solo admin, por defecto últimos 30 días)"""
+    inicio, fin = rango_reporte(fecha_inicio, fecha_fin)
+    productos = reportes_cache.get_or_load(
+        ("productos-top", inicio, fin, limite, orden), version_cache(),
+        lambda: productos_top(db, inicio, fin, limite, orden)
+    )
+    return {"fecha_inicio": inicio, "fecha_fin": fin, "productos": productos}
+
+
+@router.get("/mecanicos")
+def reporte_mecanicos(
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Trabajos completados, tiempo de ciclo e ingresos por mecánico (solo admin, por defecto últimos 30 días)"""
+    inicio, fin = rango_reporte(fecha_inicio, fecha_fin)
+    mecanicos = reportes_cache.get_or_load(
+        ("mecanicos", inicio, fin), version_cache(),
+        lambda: productividad_mecanicos(db, inicio, fin)
+    )
+    return {"fecha_inicio": inicio, "fecha_fin": fin, "mecanicos": mecanicos}
@@ -1,41 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
+from heapq import merge
+from itertools import islice
 
+from app.core.config import settings
 from app.core.database import get_db
+from app.core.jobs import encolar
+from app.core.estados import (
+    estados_origen, puede_transicionar, validar_estado, validar_estado_inicial, validar_transicion
+)
+from app.core.events import trabajos_hub
+from app.core.fields import parse_fields, parse_expand, joined_options, load_only_columns, sparse_list_adapter
+from app.core.responses import orm_response
 from app.core.deps import get_admin_user, get_mecanico_user, get_cliente_user, get_current_active_user
+from app.models.archivo import TrabajoArchivo
 from app.models.trabajo import Trabajo
 from app.models.usuario import Usuario
-from app.schemas.trabajo import TrabajoResponse, TrabajoCreate, TrabajoUpdate
+from app.schemas.trabajo import (
+    TrabajoResponse, TrabajoCreate, TrabajoUpdate, TrabajoListAdapter,
+    TrabajoEstadoLote, TrabajoEstadoLoteResponse,
+    TrabajoExpandidoResponse, TrabajoExpandidoAdapter, TrabajoExpandidoListAdapter
+)
+from app.schemas.usuario import UsuarioResumen
+from app.utils.archivo import cortes, incluir_archivo
+from app.utils.files import store_upload_file
+from app.utils.images import generate_variants  # noqa: F401 (registra la tarea)
+from app.utils.uploads import cleanup_unreferenced_upload  # noqa: F401 (registra la tarea)
 
 router = APIRouter()
 
+# ?expand=usuarios añade estas relaciones a la respuesta
+EXPANSIONES = ("usuarios",)
+RELACIONES_USUARIOS = ("mecanico", "cliente")
+
+
+def _publicar(tipo: str, trabajo: Trabajo) -> None:
+    """Enviar el trabajo a las conexiones de /trabajos/stream (después del commit)"""
+    trabajos_hub.publish(
+        tipo,
+        {"tipo": tipo, "trabajo": TrabajoResponse.model_validate(trabajo).model_dump(mode="json")},
+        {"mecanico_id": trabajo.mecanico_id, "cliente_id": trabajo.cliente_id}
+    )
+
+
+def _filtro_por_rol(usuario: Usuario):
+    """Mismo criterio que listar_trabajos: admin todo, mecánico y cliente lo suyo"""
+    usuario_id = usuario.id
+    if usuario.rol == "mecanico":
+        return lambda d: d.get("mecanico_id") == usuario_id
+    if usuario.rol == "usuario":
+        return lambda d: d.get("cliente_id") == usuario_id
+    return lambda d: True
+
 
 @router.get("/", response_model=List[TrabajoResponse])
 def listar_trabajos(
     skip: int = 0,
     limit: int = 100,
     estado: Optional[str] = None,
+    fecha_inicio: Optional[date] = None,
+    fecha_fin: Optional[date] = None,
+    fields: Optional[str] = Query(None, description="Campos a incluir, separados por coma"),
+    expand: Optional[str] = Query(None, description="usuarios: incluir id, nombre y correo de mecánico y cliente"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
-    """Listar trabajos según rol del usuario"""
-    query = db.query(Trabajo)
+    """Listar trabajos según rol del usuario (los archivados solo si el rango de fechas los alcanza)"""
+    campos = parse_fields(fields, TrabajoResponse)
+    relaciones = RELACIONES_USUARIOS if "usuarios" in parse_expand(expand, EXPANSIONES) else ()
+    inicio = datetime.combine(fecha_inicio, datetime.min.time()) if fecha_inicio else None
+    fin = datetime.combine(fecha_fin, datetime.max.time()) if fecha_fin else None
     
-    # Filtrar según rol
-    if current_user.rol == "mecanico":
-        query = query.filter(Trabajo.mecanico_id == current_user.id)
-    elif current_user.rol == "usuario":
-        query = query.filter(Trabajo.cliente_id == current_user.id)
-    # Admin ve todos
+    def consultar(modelo):
+        query = db.query(modelo)
+        
+        # Filtrar según rol
+        if current_user.rol == "mecanico":
+            query = query.filter(modelo.mecanico_id == current_user.id)
+        elif current_user.rol == "usuario":
+            query = query.filter(modelo.cliente_id == current_user.id)
+        # Admin ve todos
+        
+        # Filtro por estado
+        if estado:
+            query = query.filter(modelo.estado == estado)
+        
+        # Filtro por fecha de creación
+        if inicio:
+            query = query.filter(modelo.fecha_creacion >= inicio)
+        if fin:
+            query = query.filter(modelo.fecha_creacion <= fin)
+        
+        # Selección de campos: solo se leen las columnas pedidas
+        if campos:
+            query = query.options(load_only_columns(modelo, campos))
+        
+        # Usuarios en la misma consulta (JOIN con alias por relación)
+        if relaciones:
+            query = query.options(*joined_options(modelo, relaciones, UsuarioResumen))
+        return query
     
-    # Filtro por estado
-    if estado:
-        query = query.filter(Trabajo.estado == estado)
+    if campos:
+        adapter = sparse_list_adapter(TrabajoExpandidoResponse if relaciones else TrabajoResponse, campos + relaciones)
+    else:
+        adapter = TrabajoExpandidoListAdapter if relaciones else TrabajoListAdapter
     
-    trabajos = query.offset(skip).limit(limit).all()
-    return trabajos
+    # Sin rango de fechas se listan solo los activos
+    if (inicio or fin) and incluir_archivo(db, "trabajo", inicio):
+        n = skip + limit
+        trabajos = list(islice(
+            merge(
+                consultar(Trabajo).order_by(Trabajo.fecha_creacion.desc()).limit(n).all(),
+                consultar(TrabajoArchivo).order_by(TrabajoArchivo.fecha_creacion.desc()).limit(n).all(),
+                key=lambda t: t.fecha_creacion, reverse=True
+            ),
+            skip, n
+        ))
+    else:
+        trabajos = consultar(Trabajo).offset(skip).limit(limit).all()
+    return orm_response(adapter, trabajos)
+
+
+@router.get("/stream")
+async def stream_trabajos(
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """Cambios de trabajos en tiempo real (Server-Sent Events), filtrados por rol"""
+    # El filtro copia id y rol: la sesión de base de datos no sigue abierta
+    # mientras dura la conexión
+    return StreamingResponse(
+        trabajos_hub.stream(_filtro_por_rol(current_user), settings.EVENTS_KEEPALIVE),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/estadisticas")
@@ -50,6 +151,12 @@ def estadisticas_trabajos(
     completados = db.query(Trabajo).filter(Trabajo.estado == "completado").count()
     pagados = db.query(Trabajo).filter(Trabajo.estado == "pagado").count()
     
+    # Los archivados son todos pagados; el conteo se guarda al archivar
+    corte = cortes(db).get("trabajo")
+    if corte:
+        total += corte.filas
+        pagados += corte.filas
+    
     return {
         "total": total,
         "pendientes": pendientes,
@@ -62,11 +169,17 @@ def estadisticas_trabajos(
 @router.get("/{trabajo_id}", response_model=TrabajoResponse)
 def obtener_trabajo(
     trabajo_id: int,
+    expand: Optional[str] = Query(None, description="usuarios: incluir id, nombre y correo de mecánico y cliente"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_active_user)
 ):
-    """Obtener trabajo por ID"""
-    trabajo = db.query(Trabajo).filter(Trabajo.id == trabajo_id).first()
+    """Obtener trabajo por ID (también los archivados)"""
+    relaciones = RELACIONES_USUARIOS if "usuarios" in parse_expand(expand, EXPANSIONES) else ()
+    trabajo = (
+        db.query(Trabajo).options(*joined_options(Trabajo, relaciones, UsuarioResumen))
+        .filter(Trabajo.id == trabajo_id).first()
+        or db.get(TrabajoArchivo, trabajo_id, options=joined_options(TrabajoArchivo, relaciones, UsuarioResumen))
+    )
     if not trabajo:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -79,6 +192,8 @@ def obtener_trabajo(
     if current_user.rol == "usuario" and trabajo.cliente_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
     
+    if relaciones:
+        return orm_response(TrabajoExpandidoAdapter, trabajo)
     return trabajo
 
 
@@ -92,12 +207,16 @@ def crear_trabajo(
     if current_user.rol not in ["admin", "mecanico"]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
     
+    # Los trabajos nacen pendientes; el resto de estados se alcanza por transición
+    validar_estado_inicial(trabajo_data.estado)
+    
     new_trabajo = Trabajo(**trabajo_data.model_dump())
     new_trabajo.fecha_creacion = datetime.utcnow()
     
     db.add(new_trabajo)
     db.commit()
     db.refresh(new_trabajo)
+    _publicar("trabajo.creado", new_trabajo)
     
     return new_trabajo
 
@@ -121,6 +240,9 @@ def actualizar_trabajo(
     if current_user.rol == "mecanico" and trabajo.mecanico_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
     
+    if trabajo_data.estado is not None:
+        validar_transicion(trabajo.estado, trabajo_data.estado)
+    
     # Actualizar campos
     for field, value in trabajo_data.model_dump(exclude_unset=True).items():
         setattr(trabajo, field, value)
@@ -131,10 +253,90 @@ def actualizar_trabajo(
     
     db.commit()
     db.refresh(trabajo)
+    _publicar("trabajo.actualizado", trabajo)
     
     return trabajo
 
 
+@router.patch("/estado", response_model=TrabajoEstadoLoteResponse)
+def cambiar_estado_trabajos(
+    data: TrabajoEstadoLote,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """Cambiar el estado de varios trabajos con un solo UPDATE (admin o mecánico asignado)"""
+    if current_user.rol not in ["admin", "mecanico"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
+    
+    validar_estado(data.estado)
+    ids = list(dict.fromkeys(data.ids))
+    
+    # Clasificar para informar por qué se rechaza cada id (solo columnas necesarias)
+    actuales = {
+        t.id: t for t in db.query(Trabajo.id, Trabajo.estado, Trabajo.mecanico_id, Trabajo.cliente_id)
+        .filter(Trabajo.id.in_(ids)).all()
+    } if ids else {}
+    
+    rechazados = []
+    validos = []
+    for trabajo_id in ids:
+        trabajo = actuales.get(trabajo_id)
+        if trabajo is None:
+            rechazados.append({"id": trabajo_id, "motivo": "Trabajo no encontrado"})
+        elif current_user.rol == "mecanico" and trabajo.mecanico_id != current_user.id:
+            rechazados.append({"id": trabajo_id, "motivo": "No autorizado"})
+        elif not puede_transicionar(trabajo.estado, data.estado):
+            rechazados.append({"id": trabajo_id, "motivo": f"Transición no permitida: {trabajo.estado} → {data.estado}"})
+        else:
+            validos.append(trabajo_id)
+    
+    actualizados = 0
+    if validos:
+        # Las mismas condiciones van en el WHERE: un cambio concurrente no se pisa
+        query = (
+            update(Trabajo)
+            .where(Trabajo.id.in_(validos))
+            .where(Trabajo.estado.in_(estados_origen(data.estado)))
+        )
+        if current_user.rol == "mecanico":
+            query = query.where(Trabajo.mecanico_id == current_user.id)
+        
+        valores = {"estado": data.estado}
+        if data.estado == "completado":
+            valores["fecha_cancelacion"] = func.coalesce(Trabajo.fecha_cancelacion, datetime.utcnow())
+        
+        query = query.values(**valores).execution_options(synchronize_session=False)
+        # Ids realmente actualizados: RETURNING donde el motor lo admite; si no
+        # (MySQL), se releen en la misma transacción, con las filas ya bloqueadas
+        if db.get_bind().dialect.update_returning:
+            cambiados = set(db.execute(query.returning(Trabajo.id)).scalars())
+        else:
+            db.execute(query)
+            cambiados = set(db.scalars(
+                select(Trabajo.id).where(Trabajo.id.in_(validos), Trabajo.estado == data.estado)
+            ))
+        db.commit()
+        actualizados = len(cambiados)
+        
+        # Los que cambiaron entre la clasificación y el UPDATE no se tocaron
+        for trabajo_id in validos:
+            if trabajo_id not in cambiados:
+                rechazados.append({"id": trabajo_id, "motivo": "Modificado por otra operación, reintentar"})
+        
+        # Solo se anuncian los cambios que ocurrieron
+        for trabajo_id in validos:
+            if trabajo_id not in cambiados:
+                continue
+            trabajo = actuales[trabajo_id]
+            trabajos_hub.publish(
+                "trabajo.estado",
+                {"tipo": "trabajo.estado", "trabajo": {"id": trabajo_id, "estado": data.estado}},
+                {"mecanico_id": trabajo.mecanico_id, "cliente_id": trabajo.cliente_id}
+            )
+    
+    return {"estado": data.estado, "actualizados": actualizados, "rechazados": rechazados}
+
+
 @router.patch("/{trabajo_id}/estado", response_model=TrabajoResponse)
 def cambiar_estado_trabajo(
     trabajo_id: int,
@@ -154,11 +356,50 @@ def cambiar_estado_trabajo(
     if current_user.rol == "mecanico" and trabajo.mecanico_id != current_user.id:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
     
+    validar_transicion(trabajo.estado, nuevo_estado)
     trabajo.estado = nuevo_estado
     
-    if nuevo_estado == "completado":
+    # Se conserva la fecha de la primera vez, igual que en el cambio masivo
+    if nuevo_estado == "completado" and trabajo.fecha_cancelacion is None:
         trabajo.fecha_cancelacion = datetime.utcnow()
     
+    db.commit()
+    db.refresh(trabajo)
+    _publicar("trabajo.estado", trabajo)
+    
+    return trabajo
+
+
+@router.post("/{trabajo_id}/foto", response_model=TrabajoResponse)
+def subir_foto_trabajo(
+    trabajo_id: int,
+    foto: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """Subir foto de un trabajo (admin o mecánico asignado)"""
+    if current_user.rol not in ["admin", "mecanico"]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
+    
+    trabajo = db.query(Trabajo).filter(Trabajo.id == trabajo_id).first()
+    if not trabajo:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Trabajo no encontrado"
+        )
+    
+    # Verificar permisos
+    if current_user.rol == "mecanico" and trabajo.mecanico_id != current_user.id:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="No autorizado")
+    
+    anterior = trabajo.foto
+    trabajo.foto = store_upload_file(foto)
+    
+    # Variantes y limpieza del archivo anterior: tareas que se guardan con el commit
+    encolar(db, "imagenes.variantes", {"filename": trabajo.foto})
+    if anterior and anterior != trabajo.foto:
+        encolar(db, "uploads.limpiar", {"filename": anterior})
+    
     db.commit()
     db.refresh(trabajo)
     
@@ -179,7 +420,11 @@ def eliminar_trabajo(
             detail="Trabajo no encontrado"
         )
     
+    archivo = trabajo.foto
     db.delete(trabajo)
+    # El archivo se borra solo si ningún otro registro lo usa (tarea tras el commit)
+    if archivo:
+        encolar(db, "uploads.limpiar", {"filename": archivo})
     db.commit()
     
     return None
@@ -1,13 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, UploadFile, File
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Literal, Optional
 
 from app.core.database import get_db
-from app.core.deps import get_admin_user
+from app.core.jobs import encolar
+from app.core.fields import parse_fields, parse_ids, fetch_by_ids, load_only_columns, sparse_list_adapter
+from app.core.responses import orm_response
+from app.core.deps import get_admin_user, get_current_active_user, require_role
+from app.core.directorio import directorio_etag, directorio_headers, invalidate_directorio, listar_directorio_json
 from app.core.security import get_password_hash
 from app.models.usuario import Usuario
-from app.schemas.usuario import UsuarioResponse, UsuarioCreate, UsuarioUpdate
-from app.utils.files import save_upload_file
+from app.schemas.historial import HistorialResponse, HistorialAdapter
+from app.schemas.usuario import UsuarioResponse, UsuarioResumen, UsuarioCreate, UsuarioUpdate, UsuarioListAdapter, UsuarioMapAdapter
+from app.utils.files import store_upload_file
+from app.utils.historial import historial_cliente
+from app.utils.images import generate_variants  # noqa: F401 (registra la tarea)
+from app.utils.uploads import cleanup_unreferenced_upload  # noqa: F401 (registra la tarea)
 
 router = APIRouter()
 
@@ -16,12 +24,49 @@ router = APIRouter()
 def listar_usuarios(
     skip: int = 0,
     limit: int = 100,
+    fields: Optional[str] = Query(None, description="Campos a incluir, separados por coma"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_admin_user)
 ):
     """Listar todos los usuarios (solo admin)"""
-    usuarios = db.query(Usuario).offset(skip).limit(limit).all()
-    return usuarios
+    campos = parse_fields(fields, UsuarioResponse)
+    query = db.query(Usuario)
+    
+    # Selección de campos: solo se leen las columnas pedidas
+    adapter = UsuarioListAdapter
+    if campos:
+        query = query.options(load_only_columns(Usuario, campos))
+        adapter = sparse_list_adapter(UsuarioResponse, campos)
+    
+    usuarios = query.offset(skip).limit(limit).all()
+    return orm_response(adapter, usuarios)
+
+
+@router.get("/lote", response_model=Dict[int, UsuarioResponse])
+def obtener_usuarios_lote(
+    ids: str = Query(..., description="IDs separados por coma"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Obtener varios usuarios por ID en una sola consulta (mapa id -> usuario, solo admin)"""
+    usuarios = fetch_by_ids(db, Usuario, parse_ids(ids))
+    return orm_response(UsuarioMapAdapter, {u.id: u for u in usuarios})
+
+
+@router.get("/directorio/{rol}", response_model=List[UsuarioResumen])
+def directorio_por_rol(
+    rol: Literal["admin", "mecanico", "usuario"],
+    q: Optional[str] = Query(None, description="Prefijo de nombre o correo"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(1000, ge=1, le=1000),
+    # Antes que el ETag: el 304 solo se responde a usuarios autorizados
+    current_user: Usuario = Depends(require_role(["admin", "mecanico"])),
+    etag: str = Depends(directorio_etag),
+    db: Session = Depends(get_db)
+):
+    """Id, nombre y correo de los usuarios de un rol, para selectores (admin y mecánico; con ETag)"""
+    body = listar_directorio_json(db, rol, q, skip, limit)
+    return Response(content=body, media_type="application/json", headers=directorio_headers(etag))
 
 
 @router.get("/{usuario_id}", response_model=UsuarioResponse)
@@ -40,6 +85,28 @@ def obtener_usuario(
     return usuario
 
 
+@router.get("/{usuario_id}/historial", response_model=HistorialResponse)
+def historial_usuario(
+    usuario_id: int,
+    limite: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="Valor de 'siguiente' de la página anterior"),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_active_user)
+):
+    """Trabajos y ventas del cliente ordenados por fecha, paginados por cursor (admin o el propio cliente)"""
+    if current_user.rol != "admin" and current_user.id != usuario_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="No tienes permiso para ver este historial"
+        )
+    if current_user.id != usuario_id and db.get(Usuario, usuario_id) is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+    return orm_response(HistorialAdapter, historial_cliente(db, usuario_id, limite, cursor))
+
+
 @router.post("/", response_model=UsuarioResponse, status_code=status.HTTP_201_CREATED)
 def crear_usuario(
     usuario_data: UsuarioCreate,
@@ -66,6 +133,7 @@ def crear_usuario(
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
+    invalidate_directorio()
     
     return new_user
 
@@ -95,6 +163,36 @@ def actualizar_usuario(
     if usuario_data.contraseña is not None:
         usuario.contraseña = get_password_hash(usuario_data.contraseña)
     
+    db.commit()
+    db.refresh(usuario)
+    invalidate_directorio()
+    
+    return usuario
+
+
+@router.post("/{usuario_id}/imagen", response_model=UsuarioResponse)
+def subir_imagen_usuario(
+    usuario_id: int,
+    imagen: UploadFile = File(...),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_admin_user)
+):
+    """Subir imagen de usuario (solo admin)"""
+    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    if not usuario:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Usuario no encontrado"
+        )
+    
+    anterior = usuario.imagen
+    usuario.imagen = store_upload_file(imagen)
+    
+    # Variantes y limpieza del archivo anterior: tareas que se guardan con el commit
+    encolar(db, "imagenes.variantes", {"filename": usuario.imagen})
+    if anterior and anterior != usuario.imagen:
+        encolar(db, "uploads.limpiar", {"filename": anterior})
+    
     db.commit()
     db.refresh(usuario)
     
@@ -115,8 +213,13 @@ def eliminar_usuario(
             detail="Usuario no encontrado"
         )
     
+    archivo = usuario.imagen
     db.delete(usuario)
+    # El archivo se borra solo si ningún otro registro lo usa (tarea tras el commit)
+    if archivo:
+        encolar(db, "uploads.limpiar", {"filename": archivo})
     db.commit()
+    invalidate_directorio()
     
     return None
 
@@ -1,16 +1,101 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from typing import List, Optional
 from datetime import date, datetime, timedelta
+from heapq import merge
+from itertools import islice
 
+from app.core.catalog import invalidate_catalog
 from app.core.database import get_db
+from app.core.fields import parse_fields, parse_expand, joined_options, load_only_columns, sparse_list_adapter, fetch_by_ids
+from app.core.responses import orm_response
 from app.core.deps import get_admin_user
+from app.models.archivo import VentaArchivo
 from app.models.venta import Venta, DetalleVenta
+from app.models.producto import Producto
 from app.models.usuario import Usuario
-from app.schemas.venta import VentaResponse, VentaCreate, VentaUpdate
+from app.schemas.usuario import UsuarioResumen
+from app.schemas.venta import (
+    VentaResponse, VentaCreate, VentaUpdate, VentaListAdapter, DetalleVentaCreate,
+    VentaExpandidaResponse, VentaExpandidaAdapter, VentaExpandidaListAdapter
+)
+from app.utils.archivo import incluir_archivo
+from app.utils.cierres import totales_ventas, verificar_periodo_abierto
+from app.utils.stock import cantidades_por_producto, descontar_stock, reponer_stock, productos_sin_stock
 
 router = APIRouter()
 
+# Tolerancia al comparar precios enviados por el cliente (centavos)
+PRECIO_TOLERANCIA = 0.005
+
+# ?expand=usuarios añade estas relaciones a la respuesta
+EXPANSIONES = ("usuarios",)
+RELACIONES_USUARIOS = ("cliente", "vendedor")
+
+
+def _preciar_detalles(db: Session, detalles: List[DetalleVentaCreate]) -> List[dict]:
+    """
+    Calcular precio_unitario y subtotal de cada detalle. Los productos
+    referenciados se cargan con una sola consulta IN; los detalles sin
+    producto (mano de obra, etc.) usan el precio enviado
+    """
+    ids = list(dict.fromkeys(d.producto_id for d in detalles if d.producto_id is not None))
+    productos = {p.id: p for p in fetch_by_ids(db, Producto, ids)}
+
+    faltantes = [i for i in ids if i not in productos]
+    if faltantes:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail={"mensaje": "Producto no encontrado", "productos": faltantes}
+        )
+
+    preciados = []
+    desactualizados = []
+    for detalle in detalles:
+        if detalle.cantidad <= 0:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="La cantidad debe ser mayor que 0"
+            )
+
+        datos = detalle.model_dump()
+        producto = productos.get(detalle.producto_id)
+        if producto is not None:
+            precio = producto.precio
+            if detalle.precio_unitario is not None and abs(detalle.precio_unitario - precio) > PRECIO_TOLERANCIA:
+                desactualizados.append({
+                    "producto_id": producto.id,
+                    "precio_enviado": detalle.precio_unitario,
+                    "precio_actual": precio
+                })
+            datos["descripcion"] = detalle.descripcion or producto.nombre
+        elif detalle.precio_unitario is not None:
+            precio = detalle.precio_unitario
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="precio_unitario es obligatorio en detalles sin producto_id"
+            )
+
+        subtotal = round(precio * detalle.cantidad, 2)
+        if detalle.subtotal is not None and abs(detalle.subtotal - subtotal) > PRECIO_TOLERANCIA:
+            desactualizados.append({
+                "producto_id": detalle.producto_id,
+                "subtotal_enviado": detalle.subtotal,
+                "subtotal_calculado": subtotal
+            })
+
+        datos["precio_unitario"] = precio
+        datos["subtotal"] = subtotal
+        preciados.append(datos)
+
+    if desactualizados:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"mensaje": "Precios desactualizados", "detalles": desactualizados}
+        )
+    return preciados
+
 
 @router.get("/", response_model=List[VentaResponse])
 def listar_ventas(
@@ -19,36 +104,73 @@ def listar_ventas(
     fecha_inicio: Optional[date] = None,
     fecha_fin: Optional[date] = None,
     usuario: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Campos a incluir, separados por coma"),
+    expand: Optional[str] = Query(None, description="usuarios: incluir id, nombre y correo de cliente y vendedor"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_admin_user)
 ):
     """Listar ventas con filtros (solo admin)"""
+    campos = parse_fields(fields, VentaResponse)
+    relaciones = RELACIONES_USUARIOS if "usuarios" in parse_expand(expand, EXPANSIONES) else ()
+    
     # Filtro base: solo hoy por defecto
     if not fecha_inicio and not fecha_fin:
         hoy = date.today()
         fecha_inicio = hoy
         fecha_fin = hoy
     
-    query = db.query(Venta).join(Usuario, Venta.cliente_id == Usuario.id)
+    inicio = datetime.combine(fecha_inicio, datetime.min.time()) if fecha_inicio else None
+    fin = datetime.combine(fecha_fin, datetime.max.time()) if fecha_fin else None
     
-    # Filtro por fechas
-    if fecha_inicio:
-        inicio = datetime.combine(fecha_inicio, datetime.min.time())
-        query = query.filter(Venta.fecha >= inicio)
+    def consultar(modelo):
+        query = db.query(modelo).join(Usuario, modelo.cliente_id == Usuario.id)
+        
+        # Filtro por fechas
+        if inicio:
+            query = query.filter(modelo.fecha >= inicio)
+        
+        if fin:
+            query = query.filter(modelo.fecha <= fin)
+        
+        # Filtro por usuario
+        if usuario:
+            query = query.filter(
+                (Usuario.nombre.ilike(f"%{usuario}%")) |
+                (Usuario.correo.ilike(f"%{usuario}%"))
+            )
+        
+        # Selección de campos: solo se leen las columnas pedidas
+        if campos:
+            query = query.options(load_only_columns(modelo, campos))
+        
+        # Detalles en una sola consulta adicional (evita N+1 al serializar)
+        if not campos or "detalles" in campos:
+            query = query.options(selectinload(modelo.detalles))
+        
+        # Usuarios en la misma consulta (JOIN con alias por relación, aparte
+        # del JOIN del filtro por usuario)
+        if relaciones:
+            query = query.options(*joined_options(modelo, relaciones, UsuarioResumen))
+        
+        return query.order_by(modelo.fecha.desc())
     
-    if fecha_fin:
-        fin = datetime.combine(fecha_fin, datetime.max.time())
-        query = query.filter(Venta.fecha <= fin)
-    
-    # Filtro por usuario
-    if usuario:
-        query = query.filter(
-            (Usuario.nombre.ilike(f"%{usuario}%")) |
-            (Usuario.correo.ilike(f"%{usuario}%"))
-        )
+    if campos:
+        adapter = sparse_list_adapter(VentaExpandidaResponse if relaciones else VentaResponse, campos + relaciones)
+    else:
+        adapter = VentaExpandidaListAdapter if relaciones else VentaListAdapter
     
-    ventas = query.order_by(Venta.fecha.desc()).offset(skip).limit(limit).all()
-    return ventas
+    if incluir_archivo(db, "venta", inicio):
+        # El rango llega al archivo: ambas consultas vienen ordenadas por fecha,
+        # se mezclan y se pagina sobre el resultado
+        n = skip + limit
+        ventas = list(islice(
+            merge(consultar(Venta).limit(n).all(), consultar(VentaArchivo).limit(n).all(),
+                  key=lambda v: v.fecha, reverse=True),
+            skip, n
+        ))
+    else:
+        ventas = consultar(Venta).offset(skip).limit(limit).all()
+    return orm_response(adapter, ventas)
 
 
 @router.get("/total")
@@ -64,21 +186,12 @@ def total_ventas(
         fecha_inicio = hoy
         fecha_fin = hoy
     
-    query = db.query(Venta)
-    
-    if fecha_inicio:
-        inicio = datetime.combine(fecha_inicio, datetime.min.time())
-        query = query.filter(Venta.fecha >= inicio)
-    
-    if fecha_fin:
-        fin = datetime.combine(fecha_fin, datetime.max.time())
-        query = query.filter(Venta.fecha <= fin)
-    
-    ventas = query.all()
-    total = sum(venta.total for venta in ventas)
+    # Meses cerrados desde su cierre; el resto con COUNT/SUM en SQL
+    # (el archivo solo se consulta si el rango lo alcanza)
+    cantidad, total = totales_ventas(db, fecha_inicio, fecha_fin)
     
     return {
-        "cantidad_ventas": len(ventas),
+        "cantidad_ventas": cantidad,
         "total": total,
         "fecha_inicio": fecha_inicio,
         "fecha_fin": fecha_fin
@@ -88,16 +201,24 @@ def total_ventas(
 @router.get("/{venta_id}", response_model=VentaResponse)
 def obtener_venta(
     venta_id: int,
+    expand: Optional[str] = Query(None, description="usuarios: incluir id, nombre y correo de cliente y vendedor"),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_admin_user)
 ):
-    """Obtener venta por ID con detalles"""
-    venta = db.query(Venta).filter(Venta.id == venta_id).first()
+    """Obtener venta por ID con detalles (también las archivadas)"""
+    relaciones = RELACIONES_USUARIOS if "usuarios" in parse_expand(expand, EXPANSIONES) else ()
+    venta = (
+        db.query(Venta).options(*joined_options(Venta, relaciones, UsuarioResumen))
+        .filter(Venta.id == venta_id).first()
+        or db.get(VentaArchivo, venta_id, options=joined_options(VentaArchivo, relaciones, UsuarioResumen))
+    )
     if not venta:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Venta no encontrada"
         )
+    if relaciones:
+        return orm_response(VentaExpandidaAdapter, venta)
     return venta
 
 
@@ -107,7 +228,10 @@ def crear_venta(
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_admin_user)
 ):
-    """Crear nueva venta con detalles (solo admin)"""
+    """Crear nueva venta con detalles (solo admin). El servidor calcula precios y total"""
+    # Precios vigentes antes de escribir nada
+    detalles = _preciar_detalles(db, venta_data.detalles)
+    
     # Crear venta
     nueva_venta = Venta(
         cliente_id=venta_data.cliente_id,
@@ -121,19 +245,33 @@ def crear_venta(
     
     # Crear detalles
     total = 0
-    for detalle_data in venta_data.detalles:
+    for detalle_data in detalles:
         detalle = DetalleVenta(
-            **detalle_data.model_dump(),
+            **detalle_data,
             venta_id=nueva_venta.id
         )
         total += detalle.subtotal
         db.add(detalle)
     
     # Actualizar total
-    nueva_venta.total = total
+    nueva_venta.total = round(total, 2)
+    
+    # Descontar stock en la misma transacción (UPDATE condicional atómico)
+    cantidades = cantidades_por_producto(venta_data.detalles)
+    if not descontar_stock(db, cantidades):
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={
+                "mensaje": "Stock insuficiente o producto inexistente",
+                "productos": productos_sin_stock(db, cantidades)
+            }
+        )
     
     db.commit()
     db.refresh(nueva_venta)
+    if cantidades:
+        invalidate_catalog()
     
     return nueva_venta
 
@@ -152,6 +290,7 @@ def actualizar_venta(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Venta no encontrada"
         )
+    verificar_periodo_abierto(db, venta.fecha.date())
     
     # Actualizar campos
     for field, value in venta_data.model_dump(exclude_unset=True).items():
@@ -176,8 +315,15 @@ def eliminar_venta(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Venta no encontrada"
         )
+    verificar_periodo_abierto(db, venta.fecha.date())
+    
+    # Devolver al stock lo vendido
+    cantidades = cantidades_por_producto(venta.detalles)
+    reponer_stock(db, cantidades)
     
     db.delete(venta)
     db.commit()
+    if cantidades:
+        invalidate_catalog()
     
     return None
@@ -0,0 +1,55 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+
+class LRUCache:
+    """
+    Caché LRU acotada y segura entre hilos (los endpoints síncronos corren en
+    el threadpool). Cada entrada guarda la versión con la que se cargó: si la
+    versión actual es otra, la entrada cuenta como fallo
+    """
+
+    def __init__(self, maxsize: int = 256) -> None:
+        self.maxsize = maxsize
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key: Hashable, version: Any, loader: Callable[[], Any]) -> Any:
+        """Retornar el valor cacheado para key/version o cargarlo con loader()"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] == version:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # La carga se hace fuera del lock para no serializar consultas
+        value = loader()
+        self.set(key, version, value)
+        return value
+
+    def set(self, key: Hashable, version: Any, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (version, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entradas": len(self._data),
+                "capacidad": self.maxsize,
+                "aciertos": self.hits,
+                "fallos": self.misses,
+                "tasa_aciertos": round(self.hits / total, 4) if total else None,
+            }
@@ -0,0 +1,181 @@
+import os
+import time
+import fcntl
+from typing import List, Optional, Tuple
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.fields import load_only_columns, sparse_list_adapter
+from app.models.producto import Producto
+from app.schemas.producto import ProductoResponse, ProductoListAdapter
+from app.utils.media import etag_matches
+
+
+class CatalogVersion:
+    """
+    Contador de versión del catálogo compartido entre workers.
+    Vive en un archivo pequeño: leerlo es un pread, sin tocar la base de datos
+    """
+
+    WIDTH = 20
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._fd: Optional[int] = None
+        self._pid: Optional[int] = None
+
+    def _file(self) -> int:
+        # Reabrir tras un fork: flock se asocia al descriptor abierto
+        if self._fd is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._pid = os.getpid()
+        return self._fd
+
+    def _read(self, fd: int) -> int:
+        data = os.pread(fd, self.WIDTH, 0)
+        return int(data) if data.strip() else 0
+
+    def _write(self, fd: int, value: int) -> None:
+        os.pwrite(fd, f"{value:0{self.WIDTH}d}".encode(), 0)
+
+    def get(self) -> int:
+        """Versión actual del catálogo"""
+        fd = self._file()
+        value = self._read(fd)
+        if value == 0:
+            # Archivo nuevo: se siembra con la hora para no repetir versiones
+            # anteriores a un reinicio (evita 304 con datos distintos)
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                value = self._read(fd)
+                if value == 0:
+                    value = time.time_ns() // 1000
+                    self._write(fd, value)
+            finally:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+        return value
+
+    def bump(self) -> int:
+        """Incrementar la versión (llamar después de cada escritura de productos)"""
+        fd = self._file()
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        try:
+            value = max(self._read(fd) + 1, time.time_ns() // 1000)
+            self._write(fd, value)
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        return value
+
+
+catalog_version = CatalogVersion(settings.CATALOG_VERSION_FILE)
+
+
+def catalog_etag(request: Request) -> str:
+    """Dependency: ETag débil del catálogo. Responde 304 si el cliente ya lo tiene"""
+    opaque = f'"catalogo-{catalog_version.get()}"'
+    etag = f"W/{opaque}"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, opaque):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=catalog_headers(etag)
+        )
+    return etag
+
+
+def catalog_headers(etag: str) -> dict:
+    """Cabeceras de caché para respuestas del catálogo (revalidar siempre)"""
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+# Caché de consultas del catálogo: cada entrada lleva la versión con la que se
+# cargó, así una escritura en otro worker también la invalida
+catalog_cache = LRUCache(settings.CATALOG_CACHE_SIZE)
+
+
+def invalidate_catalog() -> None:
+    """Invalidar el catálogo tras escribir productos (caché local + versión compartida)"""
+    catalog_cache.clear()
+    catalog_version.bump()
+
+
+def _normalize(value: Optional[str], lower: bool = False) -> Optional[str]:
+    if value is None:
+        return None
+    value = value.strip()
+    if not value:
+        return None
+    return value.lower() if lower else value
+
+
+def listar_productos_json(
+    db: Session,
+    skip: int = 0,
+    limit: int = 100,
+    q: Optional[str] = None,
+    categoria: Optional[str] = None,
+    destacado: Optional[bool] = None,
+    campos: Optional[Tuple[str, ...]] = None
+) -> bytes:
+    """Listado de productos serializado, servido desde la caché cuando es posible"""
+    q = _normalize(q, lower=True)
+    categoria = _normalize(categoria)
+    key = ("productos", skip, limit, q, categoria, destacado, campos)
+
+    def load() -> bytes:
+        query = db.query(Producto)
+        
+        # Filtro por búsqueda de texto
+        if q:
+            query = query.filter(
+                (Producto.nombre.ilike(f"%{q}%")) |
+                (Producto.descripcion.ilike(f"%{q}%"))
+            )
+        
+        # Filtro por categoría
+        if categoria:
+            query = query.filter(Producto.categoria == categoria)
+        
+        # Filtro por destacados
+        if destacado is not None:
+            query = query.filter(Producto.destacado == destacado)
+        
+        # Selección de campos: solo se leen las columnas pedidas
+        adapter = ProductoListAdapter
+        if campos:
+            query = query.options(load_only_columns(Producto, campos))
+            adapter = sparse_list_adapter(ProductoResponse, campos)
+        
+        productos = query.offset(skip).limit(limit).all()
+        return adapter.dump_json(adapter.validate_python(productos, from_attributes=True))
+
+    # La versión se lee antes de consultar: si cambia durante la carga, la
+    # entrada queda con la versión vieja y el siguiente acceso la descarta
+    return catalog_cache.get_or_load(key, catalog_version.get(), load)
+
+
+def listar_categorias(db: Session) -> List[str]:
+    """Categorías únicas de productos, servidas desde la caché cuando es posible"""
+    def load() -> List[str]:
+        categorias = db.query(Producto.categoria).distinct().all()
+        return [c[0] for c in categorias if c[0]]
+
+    return catalog_cache.get_or_load(("categorias",), catalog_version.get(), load)
+
+
+def warm_catalog_cache() -> None:
+    """Precargar las consultas más frecuentes del escaparate"""
+    db = SessionLocal()
+    try:
+        listar_productos_json(db)
+        listar_productos_json(db, destacado=True)
+        for categoria in listar_categorias(db):
+            listar_productos_json(db, categoria=categoria)
+    finally:
+        db.close()
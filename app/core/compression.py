@@ -0,0 +1,169 @@
+import zlib
+from typing import List, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Brotli es opcional
+    brotli = None
+
+
+class GzipEncoder:
+    encoding = "gzip"
+
+    def __init__(self, level: int) -> None:
+        # wbits=31: formato gzip (cabecera + crc)
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class BrotliEncoder:
+    encoding = "br"
+
+    def __init__(self, quality: int) -> None:
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def flush(self) -> bytes:
+        return self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+def accepted_encodings(accept_encoding: str) -> List[str]:
+    """Codificaciones aceptadas por el cliente (ignora las que tienen q=0)"""
+    accepted = []
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        params = params.replace(" ", "")
+        if params.startswith("q=") and params[2:] in ("0", "0.0", "0.00", "0.000"):
+            continue
+        if name:
+            accepted.append(name.strip().lower())
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compresión gzip (y brotli opcional) para respuestas de texto/JSON.
+    Solo comprime tipos de contenido de la lista permitida y por encima de
+    minimum_size; respuestas ya codificadas, parciales o binarias (media)
+    pasan sin tocar
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        content_types: Optional[List[str]] = None,
+        brotli_enabled: bool = False,
+        brotli_quality: int = 4,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.content_types = tuple(content_types or ["application/json"])
+        self.brotli_enabled = brotli_enabled and brotli is not None
+        self.brotli_quality = brotli_quality
+
+    def select_encoder(self, scope: Scope):
+        accepted = accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if self.brotli_enabled and "br" in accepted:
+            return BrotliEncoder(self.brotli_quality)
+        if "gzip" in accepted:
+            return GzipEncoder(self.gzip_level)
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoder = self.select_encoder(scope)
+        if encoder is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = CompressionResponder(self, encoder)
+        await self.app(scope, receive, responder.wrap(send))
+
+
+class CompressionResponder:
+    def __init__(self, middleware: CompressionMiddleware, encoder) -> None:
+        self.middleware = middleware
+        self.encoder = encoder
+        self.initial_message: Message = {}
+        self.passthrough = False
+        self.started = False
+
+    def eligible(self, message: Message) -> bool:
+        headers = Headers(raw=message["headers"])
+        if message["status"] != 200 or "content-encoding" in headers:
+            return False
+        content_type = headers.get("content-type", "").split(";", 1)[0].strip().lower()
+        return content_type.startswith(self.middleware.content_types)
+
+    def wrap(self, send: Send) -> Send:
+        async def send_compressed(message: Message) -> None:
+            message_type = message["type"]
+
+            if message_type == "http.response.start":
+                # El inicio se retiene hasta conocer el primer bloque del cuerpo
+                self.initial_message = message
+                self.passthrough = not self.eligible(message)
+                return
+
+            if self.passthrough or message_type != "http.response.body":
+                if not self.started:
+                    self.started = True
+                    await send(self.initial_message)
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if not self.started:
+                self.started = True
+                headers = MutableHeaders(raw=self.initial_message["headers"])
+                headers.add_vary_header("Accept-Encoding")
+
+                if len(body) < self.middleware.minimum_size and not more_body:
+                    await send(self.initial_message)
+                    await send(message)
+                    self.passthrough = True
+                    return
+
+                headers["Content-Encoding"] = self.encoder.encoding
+                if more_body:
+                    del headers["Content-Length"]
+                    message["body"] = self.encoder.compress(body) + self.encoder.flush()
+                else:
+                    message["body"] = self.encoder.compress(body) + self.encoder.finish()
+                    headers["Content-Length"] = str(len(message["body"]))
+                await send(self.initial_message)
+                await send(message)
+                return
+
+            # Bloques siguientes de una respuesta en streaming
+            if more_body:
+                message["body"] = self.encoder.compress(body) + self.encoder.flush()
+            else:
+                message["body"] = self.encoder.compress(body) + self.encoder.finish()
+            await send(message)
+
+        return send_compressed
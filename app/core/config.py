@@ -1,4 +1,4 @@
-from typing import List, Union
+from typing import Dict, List, Union
 from pydantic_settings import BaseSettings
 from pydantic import AnyHttpUrl, field_validator
 
@@ -10,6 +10,8 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URI: str
+    DB_POOL_SIZE: int = 5  # conexiones por worker
+    DB_MAX_OVERFLOW: int = 10
     
     # Security
     SECRET_KEY: str
@@ -32,6 +34,62 @@ class Settings(BaseSettings):
     UPLOAD_FOLDER: str = "uploads"
     ALLOWED_EXTENSIONS: List[str] = ["png", "jpg", "jpeg", "gif"]
     MAX_UPLOAD_SIZE: int = 5 * 1024 * 1024  # 5MB
+    IMAGE_VARIANTS: Dict[str, int] = {"thumb": 200, "md": 800}  # variante -> lado máximo (px)
+    UPLOAD_GC_INTERVAL: int = 6 * 60 * 60  # segundos entre barridos (0 = desactivado)
+    UPLOAD_GC_GRACE_PERIOD: int = 24 * 60 * 60  # antigüedad mínima para borrar huérfanos
+    UPLOAD_GC_BATCH_SIZE: int = 500
+    MEDIA_CACHE_MAX_AGE: int = 60 * 60  # 1 hora (nombres no inmutables)
+    MEDIA_IMMUTABLE_MAX_AGE: int = 60 * 60 * 24 * 365  # 1 año (nombres por contenido)
+    
+    # Archivo de ventas y trabajos antiguos (tablas *_archivo)
+    ARCHIVE_AFTER_MONTHS: int = 12  # meses cerrados que se quedan en las tablas activas
+    ARCHIVE_BATCH_SIZE: int = 1000  # filas movidas por transacción
+    
+    # Reportes agregados (/reportes/productos-top, /reportes/mecanicos)
+    REPORTS_CACHE_TTL: int = 5 * 60  # segundos que se reutiliza un resultado
+    REPORTS_CACHE_SIZE: int = 128  # combinaciones de parámetros en caché
+    
+    # Importaciones masivas (CSV / NDJSON)
+    IMPORT_BATCH_SIZE: int = 1000  # filas por lote de validación y escritura
+    IMPORT_MAX_ERRORS: int = 1000  # errores por fila incluidos en la respuesta
+    
+    # Catálogo: archivo con la versión compartida entre workers (ETag)
+    CATALOG_VERSION_FILE: str = "/tmp/taller_catalogo.version"
+    CATALOG_CACHE_SIZE: int = 256  # consultas del catálogo en la caché LRU
+    
+    # Directorio de usuarios por rol (selectores de mecánico y cliente)
+    DIRECTORY_VERSION_FILE: str = "/tmp/taller_directorio.version"
+    DIRECTORY_CACHE_SIZE: int = 128
+    
+    # Calentamiento al arrancar (lifespan)
+    WARMUP_ENABLED: bool = True
+    
+    # Eventos en tiempo real (SSE en /trabajos/stream)
+    EVENTS_QUEUE_SIZE: int = 100  # eventos pendientes por conexión antes de cortarla
+    EVENTS_KEEPALIVE: int = 15  # segundos entre pings
+    EVENTS_RETRY_MS: int = 3000  # espera sugerida al cliente para reconectar
+    
+    # Tareas en segundo plano (tabla tarea)
+    JOBS_ENABLED: bool = True  # ejecutar tareas en este proceso
+    JOBS_WORKERS: int = 2  # tareas simultáneas por proceso
+    JOBS_QUEUE_SIZE: int = 1000  # ids en memoria; el resto espera en la tabla
+    JOBS_POLL_INTERVAL: int = 5  # segundos entre lecturas de la tabla
+    JOBS_MAX_ATTEMPTS: int = 5
+    JOBS_BACKOFF_BASE: float = 2.0  # segundos (se duplica en cada reintento)
+    JOBS_BACKOFF_MAX: float = 5 * 60
+    JOBS_TIMEOUT: int = 10 * 60  # una tarea "en curso" más antigua se reintenta
+    JOBS_RETENTION: int = 7 * 24 * 60 * 60  # antigüedad para borrar tareas completadas
+    
+    # Métricas (Prometheus en /metrics)
+    METRICS_ENABLED: bool = True
+    
+    # Compresión de respuestas
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 1024  # bytes
+    COMPRESSION_LEVEL: int = 6  # gzip 1-9
+    COMPRESSION_CONTENT_TYPES: List[str] = ["application/json", "text/plain", "text/html", "text/csv"]
+    COMPRESSION_BROTLI: bool = False  # requiere el paquete brotli
+    COMPRESSION_BROTLI_QUALITY: int = 4  # 0-11
     
     # Stripe
     STRIPE_PUBLIC_KEY: str = ""
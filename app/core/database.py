@@ -1,15 +1,24 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import DatabaseError
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
-from typing import Generator
+from typing import Generator, List
 
 from app.core.config import settings
 
+# Tamaño del pool por worker; SQLite (p. ej. sqlite:// en memoria para pruebas
+# y benchmarks) usa su propio pool, que no admite estos argumentos
+pool_args = {}
+if make_url(settings.DATABASE_URI).get_backend_name() != "sqlite":
+    pool_args = {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW}
+
 engine = create_engine(
     settings.DATABASE_URI,
     pool_pre_ping=True,
     pool_recycle=3600,
-    echo=False
+    echo=False,
+    **pool_args
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -26,3 +35,58 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+def create_missing_tables() -> None:
+    """
+    Crear las tablas nuevas que aún no existen (las del esquema original no
+    se tocan). Tolera que otro worker las cree al mismo tiempo
+    """
+    try:
+        Base.metadata.create_all(bind=engine)
+    except DatabaseError:
+        missing = set(Base.metadata.tables) - set(inspect(engine).get_table_names())
+        if missing:
+            raise
+
+
+def create_missing_indexes() -> List[str]:
+    """
+    Crear en las tablas existentes los índices declarados en los modelos que
+    falten. Un índice cuenta como existente si otro (o una clave única o la
+    primaria) cubre las mismas columnas, aunque tenga otro nombre.
+    En tablas grandes puede tardar minutos: se ejecuta una vez por despliegue
+    (python -m app.core.database o el hook on_starting de gunicorn), nunca en
+    el arranque de cada worker
+    """
+    created = []
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        covered = {tuple(c.name for c in table.primary_key.columns)}
+        covered.update(tuple(i["column_names"]) for i in inspector.get_indexes(table.name))
+        covered.update(tuple(u["column_names"]) for u in inspector.get_unique_constraints(table.name))
+        for index in table.indexes:
+            if tuple(c.name for c in index.columns) in covered:
+                continue
+            try:
+                index.create(bind=engine)
+                created.append(index.name)
+            except DatabaseError:
+                # Otro proceso lo creó al mismo tiempo
+                names = {i["name"] for i in inspect(engine).get_indexes(table.name)}
+                if index.name not in names:
+                    raise
+    return created
+
+
+if __name__ == "__main__":
+    # Paso de despliegue: python -m app.core.database
+    # Los modelos se registran en el Base del módulo importado, no en el de __main__
+    import app.models  # noqa: F401
+    from app.core import database
+
+    database.create_missing_tables()
+    print("Índices creados:", ", ".join(database.create_missing_indexes()) or "ninguno")
@@ -0,0 +1,71 @@
+from typing import Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.core.cache import LRUCache
+from app.core.catalog import CatalogVersion
+from app.core.config import settings
+from app.models.usuario import Usuario
+from app.schemas.usuario import UsuarioDirectorioAdapter
+from app.utils.media import etag_matches
+
+# Versión del directorio compartida entre workers (mismo mecanismo que el catálogo)
+directorio_version = CatalogVersion(settings.DIRECTORY_VERSION_FILE)
+
+# Listados serializados por (rol, prefijo, skip, limit) con la versión con que se cargaron
+directorio_cache = LRUCache(settings.DIRECTORY_CACHE_SIZE)
+
+
+def directorio_etag(request: Request) -> str:
+    """Dependency: ETag débil del directorio. Responde 304 si el cliente ya lo tiene"""
+    opaque = f'"directorio-{directorio_version.get()}"'
+    etag = f"W/{opaque}"
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, opaque):
+        raise HTTPException(
+            status_code=status.HTTP_304_NOT_MODIFIED,
+            headers=directorio_headers(etag)
+        )
+    return etag
+
+
+def directorio_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def invalidate_directorio() -> None:
+    """Invalidar el directorio tras crear, modificar o borrar usuarios"""
+    directorio_cache.clear()
+    directorio_version.bump()
+
+
+def listar_directorio_json(
+    db: Session,
+    rol: str,
+    q: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 1000
+) -> bytes:
+    """
+    Usuarios de un rol (id, nombre, correo) ordenados por nombre, serializados
+    y servidos desde la caché. q filtra por prefijo de nombre o correo
+    (LIKE 'q%', puede usar el índice rol/nombre)
+    """
+    q = (q or "").strip() or None
+    key = ("directorio", rol, q.lower() if q else None, skip, limit)
+
+    def load() -> bytes:
+        query = db.query(Usuario.id, Usuario.nombre, Usuario.correo).filter(Usuario.rol == rol)
+        if q:
+            query = query.filter(
+                Usuario.nombre.startswith(q, autoescape=True) |
+                Usuario.correo.startswith(q, autoescape=True)
+            )
+        filas = query.order_by(Usuario.nombre, Usuario.id).offset(skip).limit(limit).all()
+        return UsuarioDirectorioAdapter.dump_json(
+            UsuarioDirectorioAdapter.validate_python(filas, from_attributes=True)
+        )
+
+    return directorio_cache.get_or_load(key, directorio_version.get(), load)
@@ -0,0 +1,56 @@
+from typing import Dict, FrozenSet, Optional
+
+from fastapi import HTTPException, status
+
+# Máquina de estados de un trabajo: solo se avanza al siguiente estado
+ESTADOS_TRABAJO = ("pendiente", "en proceso", "completado", "pagado")
+ESTADO_INICIAL = "pendiente"
+
+TRANSICIONES: Dict[str, FrozenSet[str]] = {
+    "pendiente": frozenset({"en proceso"}),
+    "en proceso": frozenset({"completado"}),
+    "completado": frozenset({"pagado"}),
+    "pagado": frozenset(),
+}
+
+
+def validar_estado(estado: str) -> str:
+    """Verificar que el estado exista (400 si no)"""
+    if estado not in TRANSICIONES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Estado no válido: {estado}. Disponibles: {', '.join(ESTADOS_TRABAJO)}"
+        )
+    return estado
+
+
+def validar_estado_inicial(estado: str) -> str:
+    """Un trabajo nuevo solo puede empezar en el estado inicial (409 si no)"""
+    validar_estado(estado)
+    if estado != ESTADO_INICIAL:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Un trabajo nuevo debe empezar en '{ESTADO_INICIAL}'"
+        )
+    return estado
+
+
+def puede_transicionar(actual: Optional[str], nuevo: str) -> bool:
+    """True si se puede pasar de actual a nuevo (repetir el estado no es un cambio)"""
+    return actual == nuevo or nuevo in TRANSICIONES.get(actual, frozenset())
+
+
+def validar_transicion(actual: Optional[str], nuevo: str) -> str:
+    """Verificar estado y transición (409 si la transición no está permitida)"""
+    validar_estado(nuevo)
+    if not puede_transicionar(actual, nuevo):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Transición no permitida: {actual} → {nuevo}"
+        )
+    return nuevo
+
+
+def estados_origen(nuevo: str) -> FrozenSet[str]:
+    """Estados desde los que se puede llegar a nuevo (incluido él mismo)"""
+    return frozenset(e for e, destinos in TRANSICIONES.items() if nuevo in destinos) | {nuevo}
@@ -0,0 +1,89 @@
+import asyncio
+import itertools
+from typing import AsyncIterator, Callable, Optional, Set
+
+import orjson
+
+from app.core.config import settings
+
+
+class Suscripcion:
+    """Conexión suscrita al hub: cola acotada y filtro por destinatario"""
+
+    def __init__(self, filtro: Callable[[dict], bool], maxsize: int) -> None:
+        self.filtro = filtro
+        self.queue: "asyncio.Queue[Optional[bytes]]" = asyncio.Queue(maxsize)
+
+
+class EventHub:
+    """
+    Pub/sub en proceso para eventos en tiempo real. Los endpoints síncronos
+    publican desde el threadpool; el reparto a las colas se hace en el event
+    loop. Cada conexión cuesta una corrutina y una cola, sin hilos
+    """
+
+    def __init__(self, queue_size: int = 100) -> None:
+        self.queue_size = queue_size
+        self._suscripciones: Set[Suscripcion] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._ids = itertools.count(1)
+
+    @property
+    def conexiones(self) -> int:
+        return len(self._suscripciones)
+
+    def publish(self, tipo: str, datos: dict, destinatarios: dict) -> None:
+        """
+        Publicar un evento (llamar después del commit). destinatarios son los
+        campos usados por los filtros, p. ej. {"mecanico_id": 1, "cliente_id": 2}
+        """
+        if not self._suscripciones or self._loop is None:
+            return
+        # Se serializa una sola vez para todas las conexiones
+        mensaje = (
+            f"id: {next(self._ids)}\nevent: {tipo}\ndata: ".encode()
+            + orjson.dumps(datos)
+            + b"\n\n"
+        )
+        self._loop.call_soon_threadsafe(self._dispatch, mensaje, destinatarios)
+
+    def _dispatch(self, mensaje: bytes, destinatarios: dict) -> None:
+        for suscripcion in list(self._suscripciones):
+            if not suscripcion.filtro(destinatarios):
+                continue
+            try:
+                suscripcion.queue.put_nowait(mensaje)
+            except asyncio.QueueFull:
+                # Cliente demasiado lento: se cierra su stream para que se
+                # reconecte y recargue el estado en lugar de perder eventos
+                self._suscripciones.discard(suscripcion)
+                while not suscripcion.queue.empty():
+                    suscripcion.queue.get_nowait()
+                suscripcion.queue.put_nowait(None)
+
+    async def stream(
+        self,
+        filtro: Callable[[dict], bool],
+        keepalive: float = 15.0
+    ) -> AsyncIterator[bytes]:
+        """Generador de Server-Sent Events para una conexión"""
+        self._loop = asyncio.get_running_loop()
+        suscripcion = Suscripcion(filtro, self.queue_size)
+        self._suscripciones.add(suscripcion)
+        try:
+            yield f"retry: {settings.EVENTS_RETRY_MS}\n\n".encode()
+            while True:
+                try:
+                    mensaje = await asyncio.wait_for(suscripcion.queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    # Comentario SSE para mantener viva la conexión en proxies
+                    yield b": ping\n\n"
+                    continue
+                if mensaje is None:
+                    return
+                yield mensaje
+        finally:
+            self._suscripciones.discard(suscripcion)
+
+
+trabajos_hub = EventHub(settings.EVENTS_QUEUE_SIZE)
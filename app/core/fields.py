@@ -0,0 +1,98 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple, Type
+
+from fastapi import HTTPException, status
+from pydantic import BaseModel, ConfigDict, TypeAdapter, create_model
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, load_only
+
+
+def parse_fields(fields: Optional[str], schema: Type[BaseModel]) -> Optional[Tuple[str, ...]]:
+    """
+    Parsear ?fields=a,b,c contra los campos del schema de respuesta.
+    Retorna None si no se pidió selección; el id siempre se incluye
+    """
+    if not fields:
+        return None
+
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in schema.model_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos no válidos: {', '.join(unknown)}. Disponibles: {', '.join(schema.model_fields)}"
+        )
+
+    selected = ["id"] + [f for f in requested if f != "id"]
+    # Orden del schema para que la clave de caché no dependa del orden pedido
+    return tuple(f for f in schema.model_fields if f in selected)
+
+
+def parse_expand(expand: Optional[str], allowed: Tuple[str, ...]) -> Tuple[str, ...]:
+    """Parsear ?expand=a,b contra las expansiones que admite el endpoint"""
+    if not expand:
+        return ()
+    requested = tuple(dict.fromkeys(e.strip() for e in expand.split(",") if e.strip()))
+    unknown = [e for e in requested if e not in allowed]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Expansiones no válidas: {', '.join(unknown)}. Disponibles: {', '.join(allowed)}"
+        )
+    return requested
+
+
+def parse_ids(ids: str) -> List[int]:
+    """Parsear ?ids=1,2,3 (sin duplicados, en el orden recibido)"""
+    try:
+        parsed = [int(i) for i in ids.split(",") if i.strip()]
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="ids debe ser una lista de enteros separados por coma"
+        )
+    return list(dict.fromkeys(parsed))
+
+
+def fetch_by_ids(db, model, ids: List[int], chunk_size: int = 1000) -> list:
+    """Cargar filas por id con consultas IN (por bloques para listas muy largas)"""
+    rows = []
+    for start in range(0, len(ids), chunk_size):
+        chunk = ids[start:start + chunk_size]
+        rows.extend(db.query(model).filter(model.id.in_(chunk)).all())
+    return rows
+
+
+@lru_cache(maxsize=128)
+def sparse_schema(schema: Type[BaseModel], fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Schema de respuesta reducido a los campos pedidos (se construye una vez por combinación)"""
+    return create_model(
+        f"{schema.__name__}Parcial",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (schema.model_fields[name].annotation, schema.model_fields[name]) for name in fields}
+    )
+
+
+@lru_cache(maxsize=128)
+def sparse_list_adapter(schema: Type[BaseModel], fields: Tuple[str, ...]) -> TypeAdapter:
+    """TypeAdapter de lista para el schema reducido"""
+    return TypeAdapter(List[sparse_schema(schema, fields)])
+
+
+def load_only_columns(model, fields: Tuple[str, ...]):
+    """Opción load_only con las columnas del modelo que corresponden a los campos pedidos"""
+    columns = inspect(model).columns
+    return load_only(*[getattr(model, name) for name in fields if name in columns])
+
+
+def joined_options(model, relationships: Tuple[str, ...], schema: Type[BaseModel]) -> list:
+    """
+    joinedload de las relaciones pedidas: un LEFT JOIN con alias por relación en
+    la misma consulta, leyendo solo las columnas del schema anidado
+    """
+    options = []
+    for name in relationships:
+        attr = getattr(model, name)
+        target = attr.property.mapper.class_
+        options.append(joinedload(attr).load_only(*[getattr(target, f) for f in schema.model_fields]))
+    return options
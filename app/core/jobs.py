@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import orjson
+from anyio import to_thread
+from sqlalchemy import delete, event, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.metrics import JOB_DURATION, JOB_WAIT, JOBS_BACKLOG, JOBS_QUEUE_DEPTH, JOBS_TOTAL
+from app.models.tarea import Tarea
+
+logger = logging.getLogger(__name__)
+
+# Tipo de tarea -> función síncrona que la ejecuta (recibe el payload como kwargs)
+HANDLERS: Dict[str, Callable[..., None]] = {}
+
+# Clave en Session.info con las tareas creadas en la transacción actual
+_PENDIENTES = "tareas_pendientes"
+
+
+def tarea(tipo: str):
+    """Decorador: registrar una función como manejador de un tipo de tarea"""
+    def register(func: Callable[..., None]) -> Callable[..., None]:
+        HANDLERS[tipo] = func
+        return func
+    return register
+
+
+def encolar(
+    db: Session,
+    tipo: str,
+    payload: Optional[dict] = None,
+    max_intentos: Optional[int] = None,
+    retraso: float = 0
+) -> Tarea:
+    """
+    Registrar una tarea en la transacción de db. Se guarda junto con la
+    escritura que la origina y se ejecuta después del commit; si hay
+    rollback, la tarea desaparece con él
+    """
+    if tipo not in HANDLERS:
+        raise ValueError(f"Tipo de tarea desconocido: {tipo}")
+
+    nueva = Tarea(
+        tipo=tipo,
+        payload=orjson.dumps(payload or {}).decode(),
+        estado="pendiente",
+        intentos=0,
+        max_intentos=max_intentos or settings.JOBS_MAX_ATTEMPTS,
+        disponible_en=datetime.utcnow() + timedelta(seconds=retraso)
+    )
+    db.add(nueva)
+    db.flush()
+    if not retraso:
+        db.info.setdefault(_PENDIENTES, []).append(nueva.id)
+    return nueva
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _notificar_tras_commit(session: Session) -> None:
+    ids = session.info.pop(_PENDIENTES, None)
+    if ids:
+        job_runner.notify(ids)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _descartar_tras_rollback(session: Session) -> None:
+    session.info.pop(_PENDIENTES, None)
+
+
+def backoff(intentos: int) -> float:
+    """Segundos hasta el siguiente intento (exponencial con jitter)"""
+    delay = min(settings.JOBS_BACKOFF_MAX, settings.JOBS_BACKOFF_BASE * 2 ** max(intentos - 1, 0))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def ejecutar_tarea(tarea_id: int) -> Optional[str]:
+    """
+    Reclamar y ejecutar una tarea. El reclamo es un UPDATE condicional: si
+    otro worker (u otro proceso) ya la tomó, no hace nada. Retorna el resultado
+    """
+    db = SessionLocal()
+    try:
+        ahora = datetime.utcnow()
+        reclamada = db.execute(
+            update(Tarea)
+            .where(Tarea.id == tarea_id, Tarea.estado == "pendiente", Tarea.disponible_en <= ahora)
+            .values(estado="en curso", iniciada=ahora, intentos=Tarea.intentos + 1)
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        db.commit()
+        if not reclamada:
+            return None
+
+        t = db.get(Tarea, tarea_id)
+        JOB_WAIT.labels(t.tipo).observe(max((ahora - t.disponible_en).total_seconds(), 0))
+
+        start = time.perf_counter()
+        try:
+            handler = HANDLERS.get(t.tipo)
+            if handler is None:
+                raise LookupError(f"Tipo de tarea desconocido: {t.tipo}")
+            handler(**orjson.loads(t.payload))
+        except Exception as exc:
+            logger.exception("Tarea %s (%s) falló en el intento %s", t.id, t.tipo, t.intentos)
+            t.error = repr(exc)[:2000]
+            if t.intentos >= t.max_intentos:
+                t.estado = "fallida"
+                t.finalizada = datetime.utcnow()
+                resultado = "fallida"
+            else:
+                t.estado = "pendiente"
+                t.disponible_en = datetime.utcnow() + timedelta(seconds=backoff(t.intentos))
+                resultado = "reintento"
+        else:
+            t.estado = "completada"
+            t.finalizada = datetime.utcnow()
+            t.error = None
+            resultado = "completada"
+
+        JOB_DURATION.labels(t.tipo).observe(time.perf_counter() - start)
+        JOBS_TOTAL.labels(t.tipo, resultado).inc()
+        db.commit()
+        return resultado
+    finally:
+        db.close()
+
+
+def tareas_vencidas(limit: int) -> List[int]:
+    """
+    Mantenimiento de la tabla y lectura de tareas listas: recupera las que
+    quedaron "en curso" tras una caída, purga completadas antiguas y retorna
+    ids pendientes cuyo próximo intento ya venció
+    """
+    db = SessionLocal()
+    try:
+        ahora = datetime.utcnow()
+        db.execute(
+            update(Tarea)
+            .where(Tarea.estado == "en curso", Tarea.iniciada < ahora - timedelta(seconds=settings.JOBS_TIMEOUT))
+            .values(estado="pendiente", disponible_en=ahora)
+            .execution_options(synchronize_session=False)
+        )
+        db.execute(
+            delete(Tarea)
+            .where(Tarea.estado == "completada", Tarea.finalizada < ahora - timedelta(seconds=settings.JOBS_RETENTION))
+            .execution_options(synchronize_session=False)
+        )
+        vencidas = Tarea.estado == "pendiente", Tarea.disponible_en <= ahora
+        JOBS_BACKLOG.set(db.query(Tarea.id).filter(*vencidas).count())
+        ids = [
+            row.id for row in db.query(Tarea.id).filter(*vencidas)
+            .order_by(Tarea.disponible_en).limit(limit).all()
+        ] if limit > 0 else []
+        db.commit()
+        return ids
+    finally:
+        db.close()
+
+
+class JobRunner:
+    """
+    Pool de workers asyncio sobre una cola acotada de ids. La tabla tarea es la
+    fuente de verdad: si la cola se llena o el proceso se reinicia, el sondeo
+    periódico vuelve a encontrar las tareas pendientes
+    """
+
+    def __init__(self, workers: int, queue_size: int) -> None:
+        self.workers = workers
+        self.queue_size = queue_size
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._encoladas: set = set()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(self.queue_size)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._poll()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def notify(self, ids: List[int]) -> None:
+        """Avisar de tareas nuevas (seguro desde cualquier hilo)"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._put, ids)
+
+    def _put(self, ids: List[int]) -> None:
+        for tarea_id in ids:
+            if tarea_id in self._encoladas:
+                continue
+            try:
+                self._queue.put_nowait(tarea_id)
+            except asyncio.QueueFull:
+                # Quedan en la tabla: el sondeo las retoma
+                break
+            self._encoladas.add(tarea_id)
+        JOBS_QUEUE_DEPTH.set(self._queue.qsize())
+
+    async def _worker(self) -> None:
+        while True:
+            tarea_id = await self._queue.get()
+            self._encoladas.discard(tarea_id)
+            JOBS_QUEUE_DEPTH.set(self._queue.qsize())
+            try:
+                await to_thread.run_sync(ejecutar_tarea, tarea_id)
+            except Exception:
+                logger.exception("Error ejecutando la tarea %s", tarea_id)
+
+    async def _poll(self) -> None:
+        while True:
+            try:
+                libres = self.queue_size - self._queue.qsize()
+                self._put(await to_thread.run_sync(tareas_vencidas, libres))
+            except Exception:
+                logger.exception("Error leyendo la tabla de tareas")
+            await asyncio.sleep(settings.JOBS_POLL_INTERVAL)
+
+
+job_runner = JobRunner(settings.JOBS_WORKERS, settings.JOBS_QUEUE_SIZE)
@@ -0,0 +1,174 @@
+import os
+import time
+
+from anyio import to_thread
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+from prometheus_client import multiprocess
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.database import engine
+
+# Con varios workers, PROMETHEUS_MULTIPROC_DIR hace que cada proceso escriba
+# sus valores en archivos mmap y /metrics los agrega al exponerlos
+MULTIPROCESS = "PROMETHEUS_MULTIPROC_DIR" in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+REQUESTS = Counter(
+    "http_requests_total",
+    "Peticiones HTTP por ruta, método y clase de estado",
+    ["method", "route", "status"],
+)
+LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latencia de las peticiones HTTP por ruta",
+    ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "Peticiones HTTP en curso",
+    multiprocess_mode="livesum",
+)
+SSE_CONNECTIONS = Gauge(
+    "sse_connections_open",
+    "Conexiones Server-Sent Events abiertas (fuera de peticiones en curso y latencia)",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_IN_USE = Gauge(
+    "threadpool_threads_in_use",
+    "Hilos del threadpool ocupados por endpoints síncronos",
+    multiprocess_mode="livesum",
+)
+THREADPOOL_LIMIT = Gauge(
+    "threadpool_threads_limit",
+    "Tamaño máximo del threadpool",
+    multiprocess_mode="livesum",
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_connections_in_use",
+    "Conexiones del pool de base de datos en uso",
+    multiprocess_mode="livesum",
+)
+DB_POOL_SIZE = Gauge(
+    "db_pool_connections_open",
+    "Conexiones abiertas en el pool de base de datos",
+    multiprocess_mode="livesum",
+)
+JOBS_QUEUE_DEPTH = Gauge(
+    "jobs_queue_depth",
+    "Tareas en la cola en memoria esperando un worker",
+    multiprocess_mode="livesum",
+)
+JOBS_BACKLOG = Gauge(
+    "jobs_backlog",
+    "Tareas pendientes y vencidas en la tabla tarea",
+    multiprocess_mode="max",
+)
+JOBS_TOTAL = Counter(
+    "jobs_total",
+    "Ejecuciones de tareas por tipo y resultado",
+    ["tipo", "resultado"],
+)
+JOB_WAIT = Histogram(
+    "job_wait_seconds",
+    "Espera desde que la tarea está disponible hasta que empieza",
+    ["tipo"],
+    buckets=LATENCY_BUCKETS + (30.0, 60.0, 300.0),
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Duración de la ejecución de cada tarea",
+    ["tipo"],
+    buckets=LATENCY_BUCKETS + (30.0, 60.0, 300.0),
+)
+
+
+def route_label(scope: Scope) -> str:
+    """Plantilla de la ruta (/productos/{producto_id}) para acotar la cardinalidad"""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "sin_ruta"
+
+
+def sample_pools() -> None:
+    """Actualizar los gauges de saturación del threadpool y del pool de conexiones"""
+    limiter = to_thread.current_default_thread_limiter()
+    THREADPOOL_IN_USE.set(limiter.borrowed_tokens)
+    THREADPOOL_LIMIT.set(limiter.total_tokens)
+
+    pool = engine.pool
+    if hasattr(pool, "checkedout"):
+        DB_POOL_CHECKED_OUT.set(pool.checkedout())
+        DB_POOL_SIZE.set(pool.checkedin() + pool.checkedout())
+
+
+def is_event_stream(message: Message) -> bool:
+    """True si la respuesta que empieza es text/event-stream (SSE)"""
+    for name, value in message.get("headers", ()):
+        if name.lower() == b"content-type":
+            return value.split(b";")[0].strip().lower() == b"text/event-stream"
+    return False
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI: conteo, latencia y peticiones en curso por ruta. Las
+    conexiones SSE duran minutos u horas: al detectarlas pasan a su propio
+    gauge y no se registran en la latencia
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        streaming = False
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if is_event_stream(message):
+                    streaming = True
+                    IN_PROGRESS.dec()
+                    SSE_CONNECTIONS.inc()
+            await send(message)
+
+        IN_PROGRESS.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            route = route_label(scope)
+            REQUESTS.labels(scope["method"], route, f"{status_code // 100}xx").inc()
+            if streaming:
+                SSE_CONNECTIONS.dec()
+            else:
+                IN_PROGRESS.dec()
+                LATENCY.labels(scope["method"], route).observe(elapsed)
+            sample_pools()
+
+
+def metrics_response() -> Response:
+    """Exposición en formato de texto de Prometheus (agregada entre workers si aplica)"""
+    sample_pools()
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(content=generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,23 @@
+from typing import Any, Optional
+
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+def orm_response(
+    adapter: TypeAdapter,
+    rows: Any,
+    status_code: int = 200,
+    headers: Optional[dict] = None
+) -> Response:
+    """
+    Serializar filas ORM directamente a JSON con un TypeAdapter precompilado.
+    Evita la validación + jsonable_encoder que FastAPI aplica con response_model
+    """
+    data = adapter.validate_python(rows, from_attributes=True)
+    return Response(
+        content=adapter.dump_json(data),
+        status_code=status_code,
+        headers=headers,
+        media_type="application/json"
+    )
@@ -0,0 +1,13 @@
+from uvicorn.workers import UvicornWorker
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """Worker de gunicorn con uvloop + httptools (incluidos en uvicorn[standard])"""
+
+    CONFIG_KWARGS = {
+        "loop": "uvloop",
+        "http": "httptools",
+        "lifespan": "on",
+        "proxy_headers": True,
+        "server_header": False,
+    }
@@ -0,0 +1,66 @@
+import time
+import logging
+
+import bcrypt
+from sqlalchemy import text
+
+from app.core.catalog import warm_catalog_cache
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.security import create_access_token, decode_access_token, verify_password
+from app.models.gasto import Gasto
+from app.models.trabajo import Trabajo
+from app.models.usuario import Usuario
+from app.models.venta import Venta
+
+logger = logging.getLogger(__name__)
+
+
+def _open_pool_connections() -> None:
+    """Abrir DB_POOL_SIZE conexiones y devolverlas al pool"""
+    connections = []
+    try:
+        for _ in range(settings.DB_POOL_SIZE):
+            connection = engine.connect()
+            connection.execute(text("SELECT 1"))
+            connections.append(connection)
+    finally:
+        for connection in connections:
+            connection.close()
+
+
+def _compile_queries() -> None:
+    """Ejecutar una vez las consultas de los listados para llenar la caché de SQL compilado"""
+    db = SessionLocal()
+    try:
+        db.query(Usuario).filter(Usuario.id == 0).first()
+        db.query(Usuario).offset(0).limit(1).all()
+        db.query(Trabajo).offset(0).limit(1).all()
+        db.query(Venta).join(Usuario, Venta.cliente_id == Usuario.id).order_by(Venta.fecha.desc()).limit(1).all()
+        db.query(Gasto).order_by(Gasto.fecha.desc()).limit(1).all()
+    finally:
+        db.close()
+
+
+def _prime_security() -> None:
+    """Primera llamada a bcrypt y JWT (carga de backends) fuera de una petición"""
+    verify_password("warmup", bcrypt.hashpw(b"warmup", bcrypt.gensalt(rounds=4)).decode())
+    decode_access_token(create_access_token({"sub": "0"}))
+
+
+def warm_up() -> dict:
+    """Calentar el worker antes de aceptar tráfico. Retorna la duración de cada paso (ms)"""
+    timings = {}
+    for name, step in [
+        ("pool", _open_pool_connections),
+        ("consultas", _compile_queries),
+        ("catalogo", warm_catalog_cache),
+        ("seguridad", _prime_security),
+    ]:
+        start = time.perf_counter()
+        try:
+            step()
+        except Exception:
+            logger.exception("Falló el paso de calentamiento %s", name)
+        timings[name] = round((time.perf_counter() - start) * 1000, 1)
+    return timings
@@ -3,7 +3,10 @@ from app.models.usuario import Usuario
 from app.models.producto import Producto
 from app.models.trabajo import Trabajo
 from app.models.venta import Venta, DetalleVenta
-from app.models.gasto import Gasto
+from app.models.gasto import Gasto, GastoHuella
+from app.models.tarea import Tarea
+from app.models.archivo import VentaArchivo, DetalleVentaArchivo, TrabajoArchivo, ArchivoCorte
+from app.models.cierre import CierreMensual
 
 __all__ = [
     "Base",
@@ -12,5 +15,12 @@ __all__ = [
     "Trabajo",
     "Venta",
     "DetalleVenta",
-    "Gasto"
+    "Gasto",
+    "GastoHuella",
+    "Tarea",
+    "VentaArchivo",
+    "DetalleVentaArchivo",
+    "TrabajoArchivo",
+    "ArchivoCorte",
+    "CierreMensual"
 ]
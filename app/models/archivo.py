@@ -0,0 +1,69 @@
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from app.core.database import Base
+
+
+# Tablas frías: mismas columnas e ids que las originales, sin claves foráneas
+# hacia las tablas activas (el histórico no bloquea borrados)
+
+class VentaArchivo(Base):
+    __tablename__ = "venta_archivo"
+    
+    id = Column(Integer, primary_key=True)
+    fecha = Column(DateTime, nullable=False, index=True)
+    total = Column(Float, nullable=False, default=0.0)
+    
+    cliente_id = Column(Integer, nullable=False, index=True)
+    vendedor_id = Column(Integer, nullable=False)
+    trabajo_id = Column(Integer, nullable=True)
+    
+    # Relaciones
+    detalles = relationship("DetalleVentaArchivo", back_populates="venta")
+    cliente = relationship("Usuario", primaryjoin="foreign(VentaArchivo.cliente_id) == Usuario.id", viewonly=True)
+    vendedor = relationship("Usuario", primaryjoin="foreign(VentaArchivo.vendedor_id) == Usuario.id", viewonly=True)
+
+
+class DetalleVentaArchivo(Base):
+    __tablename__ = "detalle_venta_archivo"
+    
+    id = Column(Integer, primary_key=True)
+    cantidad = Column(Integer, nullable=False)
+    precio_unitario = Column(Float, nullable=False)
+    subtotal = Column(Float, nullable=False)
+    descripcion = Column(String(255), nullable=True)
+    
+    venta_id = Column(Integer, ForeignKey("venta_archivo.id"), nullable=False, index=True)
+    producto_id = Column(Integer, nullable=True)
+    
+    # Relaciones
+    venta = relationship("VentaArchivo", back_populates="detalles")
+
+
+class TrabajoArchivo(Base):
+    __tablename__ = "trabajo_archivo"
+    
+    id = Column(Integer, primary_key=True)
+    descripcion = Column(String(255), nullable=False)
+    estado = Column(String(50), nullable=False)
+    foto = Column(String(255), nullable=True)
+    fecha_creacion = Column(DateTime, index=True)
+    costo = Column(Float, nullable=True)
+    fecha_cancelacion = Column(DateTime, nullable=True, index=True)
+    
+    mecanico_id = Column(Integer, nullable=False, index=True)
+    cliente_id = Column(Integer, nullable=False, index=True)
+    
+    # Relaciones de solo lectura (sin clave foránea)
+    mecanico = relationship("Usuario", primaryjoin="foreign(TrabajoArchivo.mecanico_id) == Usuario.id", viewonly=True)
+    cliente = relationship("Usuario", primaryjoin="foreign(TrabajoArchivo.cliente_id) == Usuario.id", viewonly=True)
+
+
+class ArchivoCorte(Base):
+    """Hasta qué fecha se archivó cada tabla y cuántas filas hay en el archivo"""
+    __tablename__ = "archivo_corte"
+    
+    tabla = Column(String(50), primary_key=True)
+    hasta = Column(DateTime, nullable=False)  # todo lo archivado es anterior a esta fecha
+    filas = Column(Integer, nullable=False, default=0)
+    actualizado = Column(DateTime, default=datetime.utcnow)
@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, String, Text, Float, DateTime
+from datetime import datetime
+from app.core.database import Base
+
+
+class CierreMensual(Base):
+    """Resumen congelado de un mes cerrado (no se recalcula)"""
+    __tablename__ = "cierre_mensual"
+    
+    periodo = Column(String(7), primary_key=True)  # AAAA-MM
+    ventas_cantidad = Column(Integer, nullable=False, default=0)
+    ventas_total = Column(Float, nullable=False, default=0.0)
+    gastos_cantidad = Column(Integer, nullable=False, default=0)
+    gastos_total = Column(Float, nullable=False, default=0.0)
+    margen = Column(Float, nullable=False, default=0.0)
+    trabajos_completados = Column(Integer, nullable=False, default=0)
+    por_vendedor = Column(Text, nullable=False)  # JSON
+    por_categoria = Column(Text, nullable=False)  # JSON
+    cerrado_en = Column(DateTime, default=datetime.utcnow, nullable=False)
+    cerrado_por = Column(Integer, nullable=True)  # usuario.id
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime
+from sqlalchemy import Column, Integer, String, Text, Float, Date, DateTime, ForeignKey
 from datetime import datetime
 from app.core.database import Base
 
@@ -12,3 +12,12 @@ class Gasto(Base):
     categoria = Column(String(50), nullable=False)
     fecha = Column(Date, nullable=False)
     creado_en = Column(DateTime, default=datetime.utcnow)
+
+
+class GastoHuella(Base):
+    """Huella de contenido de cada fila importada (evita duplicar extractos)"""
+    __tablename__ = "gasto_huella"
+    
+    huella = Column(String(64), primary_key=True)  # sha256 hex
+    gasto_id = Column(Integer, ForeignKey("gastos.id", ondelete="CASCADE"), nullable=False, index=True)
+    creado_en = Column(DateTime, default=datetime.utcnow)
@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text, Float, Boolean
+from sqlalchemy import Column, Integer, String, Text, Float, Boolean, Index
 from app.core.database import Base
 
 
 class Producto(Base):
     __tablename__ = "producto"
+    __table_args__ = (
+        Index("ix_producto_nombre", "nombre"),  # clave natural de la importación
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String(100), nullable=False)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Text, DateTime, Index
+from datetime import datetime
+from app.core.database import Base
+
+
+class Tarea(Base):
+    __tablename__ = "tarea"
+    __table_args__ = (
+        Index("ix_tarea_estado_disponible", "estado", "disponible_en"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    tipo = Column(String(100), nullable=False)
+    payload = Column(Text, nullable=False)  # JSON con los argumentos
+    estado = Column(String(20), nullable=False, default="pendiente")  # pendiente, en curso, completada, fallida
+    intentos = Column(Integer, nullable=False, default=0)
+    max_intentos = Column(Integer, nullable=False, default=5)
+    error = Column(Text, nullable=True)
+    creada = Column(DateTime, default=datetime.utcnow, nullable=False)
+    disponible_en = Column(DateTime, default=datetime.utcnow, nullable=False)  # próximo intento
+    iniciada = Column(DateTime, nullable=True)
+    finalizada = Column(DateTime, nullable=True)
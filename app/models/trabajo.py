@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,6 +6,10 @@ from app.core.database import Base
 
 class Trabajo(Base):
     __tablename__ = "trabajo"
+    __table_args__ = (
+        Index("ix_trabajo_cancelacion_mecanico", "fecha_cancelacion", "mecanico_id"),  # productividad
+        Index("ix_trabajo_cliente_creacion", "cliente_id", "fecha_creacion"),  # historial del cliente
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     descripcion = Column(String(255), nullable=False)
@@ -17,3 +21,7 @@ class Trabajo(Base):
     
     mecanico_id = Column(Integer, ForeignKey("usuario.id"), nullable=False)
     cliente_id = Column(Integer, ForeignKey("usuario.id"), nullable=False)
+    
+    # Relaciones de solo lectura (?expand=usuarios las carga con joinedload)
+    mecanico = relationship("Usuario", foreign_keys=[mecanico_id], viewonly=True)
+    cliente = relationship("Usuario", foreign_keys=[cliente_id], viewonly=True)
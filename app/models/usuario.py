@@ -1,9 +1,12 @@
-from sqlalchemy import Column, Integer, String, Text
+from sqlalchemy import Column, Integer, String, Text, Index
 from app.core.database import Base
 
 
 class Usuario(Base):
     __tablename__ = "usuario"
+    __table_args__ = (
+        Index("ix_usuario_rol_nombre", "rol", "nombre"),  # directorio por rol
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     correo = Column(String(120), unique=True, nullable=False, index=True)
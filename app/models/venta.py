@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Text
+from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -6,6 +6,10 @@ from app.core.database import Base
 
 class Venta(Base):
     __tablename__ = "venta"
+    __table_args__ = (
+        Index("ix_venta_fecha", "fecha"),  # totales, listados y reportes por rango
+        Index("ix_venta_cliente_fecha", "cliente_id", "fecha"),  # historial del cliente
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     fecha = Column(DateTime, default=datetime.utcnow, nullable=False)
@@ -17,10 +21,15 @@ class Venta(Base):
     
     # Relaciones
     detalles = relationship("DetalleVenta", back_populates="venta", cascade="all, delete-orphan")
+    cliente = relationship("Usuario", foreign_keys=[cliente_id], viewonly=True)
+    vendedor = relationship("Usuario", foreign_keys=[vendedor_id], viewonly=True)
 
 
 class DetalleVenta(Base):
     __tablename__ = "detalle_venta"
+    __table_args__ = (
+        Index("ix_detalle_venta_venta_producto", "venta_id", "producto_id"),  # productos más vendidos
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     cantidad = Column(Integer, nullable=False)
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Optional
 from datetime import date, datetime
 
 
@@ -27,3 +27,7 @@ class GastoResponse(GastoBase):
     
     class Config:
         from_attributes = True
+
+
+# Serialización rápida de listados (ver app.core.responses.orm_response)
+GastoListAdapter = TypeAdapter(List[GastoResponse])
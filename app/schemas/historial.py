@@ -0,0 +1,21 @@
+from pydantic import BaseModel, TypeAdapter
+from typing import List, Literal, Optional
+from datetime import datetime
+
+from app.schemas.trabajo import TrabajoResponse
+from app.schemas.venta import VentaResponse
+
+
+class HistorialItem(BaseModel):
+    tipo: Literal["trabajo", "venta"]
+    fecha: datetime
+    trabajo: Optional[TrabajoResponse] = None
+    venta: Optional[VentaResponse] = None
+
+
+class HistorialResponse(BaseModel):
+    items: List[HistorialItem]
+    siguiente: Optional[str] = None  # cursor de la página siguiente (None si no hay más)
+
+
+HistorialAdapter = TypeAdapter(HistorialResponse)
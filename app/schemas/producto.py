@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, TypeAdapter
+from typing import Dict, List, Optional
 
 
 class ProductoBase(BaseModel):
@@ -30,3 +30,8 @@ class ProductoResponse(ProductoBase):
     
     class Config:
         from_attributes = True
+
+
+# Serialización rápida de listados (ver app.core.responses.orm_response)
+ProductoListAdapter = TypeAdapter(List[ProductoResponse])
+ProductoMapAdapter = TypeAdapter(Dict[int, ProductoResponse])
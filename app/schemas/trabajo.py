@@ -1,7 +1,9 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field, TypeAdapter
+from typing import List, Optional
 from datetime import datetime
 
+from app.schemas.usuario import UsuarioResumen
+
 
 class TrabajoBase(BaseModel):
     descripcion: str
@@ -12,7 +14,7 @@ class TrabajoBase(BaseModel):
 
 
 class TrabajoCreate(TrabajoBase):
-    pass
+    estado: str = "pendiente"  # único estado inicial permitido
 
 
 class TrabajoUpdate(BaseModel):
@@ -23,6 +25,18 @@ class TrabajoUpdate(BaseModel):
     cliente_id: Optional[int] = None
 
 
+class TrabajoEstadoLote(BaseModel):
+    # Un solo IN en el SELECT y el UPDATE: mismo tope que los bloques de fetch_by_ids
+    ids: List[int] = Field(..., min_length=1, max_length=1000)
+    estado: str
+
+
+class TrabajoEstadoLoteResponse(BaseModel):
+    estado: str
+    actualizados: int
+    rechazados: List[dict] = []
+
+
 class TrabajoResponse(TrabajoBase):
     id: int
     foto: Optional[str] = None
@@ -31,3 +45,14 @@ class TrabajoResponse(TrabajoBase):
     
     class Config:
         from_attributes = True
+
+
+class TrabajoExpandidoResponse(TrabajoResponse):
+    mecanico: Optional[UsuarioResumen] = None
+    cliente: Optional[UsuarioResumen] = None
+
+
+# Serialización rápida de listados (ver app.core.responses.orm_response)
+TrabajoListAdapter = TypeAdapter(List[TrabajoResponse])
+TrabajoExpandidoAdapter = TypeAdapter(TrabajoExpandidoResponse)
+TrabajoExpandidoListAdapter = TypeAdapter(List[TrabajoExpandidoResponse])
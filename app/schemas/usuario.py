@@ -1,5 +1,5 @@
-from pydantic import BaseModel, EmailStr
-from typing import Optional
+from pydantic import BaseModel, EmailStr, TypeAdapter
+from typing import Dict, List, Optional
 
 
 class UsuarioBase(BaseModel):
@@ -27,6 +27,16 @@ class UsuarioResponse(UsuarioBase):
         from_attributes = True
 
 
+class UsuarioResumen(BaseModel):
+    """Datos de un usuario incluidos en otras respuestas (?expand=usuarios)"""
+    id: int
+    nombre: str
+    correo: str
+    
+    class Config:
+        from_attributes = True
+
+
 class UsuarioLogin(BaseModel):
     correo: EmailStr
     contraseña: str
@@ -36,3 +46,9 @@ class Token(BaseModel):
     access_token: str
     token_type: str
     user: UsuarioResponse
+
+
+# Serialización rápida de listados (ver app.core.responses.orm_response)
+UsuarioListAdapter = TypeAdapter(List[UsuarioResponse])
+UsuarioMapAdapter = TypeAdapter(Dict[int, UsuarioResponse])
+UsuarioDirectorioAdapter = TypeAdapter(List[UsuarioResumen])
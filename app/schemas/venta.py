@@ -1,7 +1,9 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
 from typing import Optional, List
 from datetime import datetime
 
+from app.schemas.usuario import UsuarioResumen
+
 
 class DetalleVentaBase(BaseModel):
     cantidad: int
@@ -12,7 +14,10 @@ class DetalleVentaBase(BaseModel):
 
 
 class DetalleVentaCreate(DetalleVentaBase):
-    pass
+    # Con producto_id el servidor calcula precio y subtotal; si se envían,
+    # deben coincidir con el precio vigente
+    precio_unitario: Optional[float] = None
+    subtotal: Optional[float] = None
 
 
 class DetalleVentaResponse(DetalleVentaBase):
@@ -46,3 +51,14 @@ class VentaResponse(VentaBase):
     
     class Config:
         from_attributes = True
+
+
+class VentaExpandidaResponse(VentaResponse):
+    cliente: Optional[UsuarioResumen] = None
+    vendedor: Optional[UsuarioResumen] = None
+
+
+# Serialización rápida de listados (ver app.core.responses.orm_response)
+VentaListAdapter = TypeAdapter(List[VentaResponse])
+VentaExpandidaAdapter = TypeAdapter(VentaExpandidaResponse)
+VentaExpandidaListAdapter = TypeAdapter(List[VentaExpandidaResponse])
@@ -0,0 +1,131 @@
+import logging
+from datetime import date, datetime
+from typing import Dict, Optional
+
+from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.jobs import tarea
+from app.models.archivo import ArchivoCorte, DetalleVentaArchivo, TrabajoArchivo, VentaArchivo
+from app.models.trabajo import Trabajo
+from app.models.venta import DetalleVenta, Venta
+
+logger = logging.getLogger(__name__)
+
+
+def corte_para(meses: int, hoy: Optional[date] = None) -> datetime:
+    """Primer día del mes que quedó `meses` meses atrás (solo se archivan meses cerrados)"""
+    hoy = hoy or date.today()
+    indice = hoy.year * 12 + hoy.month - 1 - meses
+    return datetime(indice // 12, indice % 12 + 1, 1)
+
+
+def cortes(db: Session) -> Dict[str, ArchivoCorte]:
+    """Estado del archivo por tabla (una consulta a una tabla de pocas filas)"""
+    return {c.tabla: c for c in db.query(ArchivoCorte).all()}
+
+
+def incluir_archivo(db: Session, tabla: str, desde: Optional[datetime]) -> bool:
+    """True si el rango que empieza en `desde` (None = sin límite) llega a datos archivados"""
+    corte = db.get(ArchivoCorte, tabla)
+    if corte is None or not corte.filas:
+        return False
+    return desde is None or desde < corte.hasta
+
+
+def _registrar_corte(db: Session, tabla: str, hasta: datetime) -> None:
+    corte = db.get(ArchivoCorte, tabla)
+    if corte is None:
+        db.add(ArchivoCorte(tabla=tabla, hasta=hasta, filas=0, actualizado=datetime.utcnow()))
+    elif hasta > corte.hasta:
+        corte.hasta = hasta
+        corte.actualizado = datetime.utcnow()
+
+
+def _copiar(origen, destino, condicion):
+    """INSERT INTO destino SELECT ... FROM origen WHERE condicion (mismas columnas)"""
+    columnas = [c.name for c in destino.__table__.columns]
+    return insert(destino).from_select(
+        columnas, select(*[origen.__table__.c[c] for c in columnas]).where(condicion)
+    )
+
+
+def _sumar_filas(db: Session, tabla: str, cantidad: int) -> None:
+    db.execute(
+        update(ArchivoCorte)
+        .where(ArchivoCorte.tabla == tabla)
+        .values(filas=ArchivoCorte.filas + cantidad, actualizado=datetime.utcnow())
+    )
+
+
+def archivar_ventas(db: Session, hasta: datetime, lote: int) -> int:
+    """Mover ventas (con sus detalles) anteriores a `hasta`, un lote por transacción"""
+    movidas = 0
+    while True:
+        ids = [i for (i,) in db.query(Venta.id).filter(Venta.fecha < hasta).order_by(Venta.id).limit(lote)]
+        if not ids:
+            return movidas
+        db.execute(_copiar(Venta, VentaArchivo, Venta.id.in_(ids)))
+        db.execute(_copiar(DetalleVenta, DetalleVentaArchivo, DetalleVenta.venta_id.in_(ids)))
+        db.execute(delete(DetalleVenta).where(DetalleVenta.venta_id.in_(ids)).execution_options(synchronize_session=False))
+        db.execute(delete(Venta).where(Venta.id.in_(ids)).execution_options(synchronize_session=False))
+        _sumar_filas(db, "venta", len(ids))
+        db.commit()
+        movidas += len(ids)
+
+
+def archivar_trabajos(db: Session, hasta: datetime, lote: int) -> int:
+    """
+    Mover trabajos pagados creados antes de `hasta`. Los que aún tienen una
+    venta activa se quedan (la clave foránea de venta apunta a trabajo)
+    """
+    condicion = (
+        (Trabajo.estado == "pagado")
+        & (Trabajo.fecha_creacion < hasta)
+        & ~exists().where(Venta.trabajo_id == Trabajo.id)
+    )
+    movidos = 0
+    while True:
+        ids = [i for (i,) in db.query(Trabajo.id).filter(condicion).order_by(Trabajo.id).limit(lote)]
+        if not ids:
+            return movidos
+        db.execute(_copiar(Trabajo, TrabajoArchivo, Trabajo.id.in_(ids)))
+        db.execute(delete(Trabajo).where(Trabajo.id.in_(ids)).execution_options(synchronize_session=False))
+        _sumar_filas(db, "trabajo", len(ids))
+        db.commit()
+        movidos += len(ids)
+
+
+@tarea("archivo.mover")
+def archivar(meses: Optional[int] = None, lote: Optional[int] = None) -> dict:
+    """Archivar ventas y trabajos de los meses cerrados más antiguos que `meses`"""
+    meses = settings.ARCHIVE_AFTER_MONTHS if meses is None else meses
+    lote = lote or settings.ARCHIVE_BATCH_SIZE
+    hasta = corte_para(meses)
+
+    db = SessionLocal()
+    try:
+        # El corte se registra antes de mover: durante el proceso las lecturas
+        # de ese rango ya consultan ambas tablas y no pierden filas
+        _registrar_corte(db, "venta", hasta)
+        _registrar_corte(db, "trabajo", hasta)
+        db.commit()
+
+        resultado = {
+            "hasta": hasta.isoformat(),
+            "ventas": archivar_ventas(db, hasta, lote),
+            "trabajos": archivar_trabajos(db, hasta, lote),
+        }
+        logger.info("Archivo: %s", resultado)
+        return resultado
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    # Para cron: python -m app.utils.archivo [meses]
+    import sys
+
+    print(archivar(int(sys.argv[1]) if len(sys.argv) > 1 else None))
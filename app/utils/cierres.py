@@ -0,0 +1,255 @@
+import re
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.archivo import TrabajoArchivo, VentaArchivo
+from app.models.cierre import CierreMensual
+from app.models.gasto import Gasto
+from app.models.trabajo import Trabajo
+from app.models.usuario import Usuario
+from app.models.venta import Venta
+from app.utils.archivo import incluir_archivo
+
+PERIODO_RE = re.compile(r"^\d{4}-(0[1-9]|1[0-2])$")
+
+
+def parsear_periodo(periodo: str) -> date:
+    """Primer día del periodo AAAA-MM (400 si no es válido)"""
+    if not PERIODO_RE.match(periodo):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Periodo no válido: usar AAAA-MM"
+        )
+    return date(int(periodo[:4]), int(periodo[5:]), 1)
+
+
+def periodo_de(fecha: date) -> str:
+    return f"{fecha.year:04d}-{fecha.month:02d}"
+
+
+def mes_siguiente(primer_dia: date) -> date:
+    return date(primer_dia.year + primer_dia.month // 12, primer_dia.month % 12 + 1, 1)
+
+
+def periodos_cerrados(db: Session) -> Set[str]:
+    """Periodos con cierre (tabla pequeña: una fila por mes)"""
+    return {p for (p,) in db.query(CierreMensual.periodo)}
+
+
+def verificar_periodo_abierto(db: Session, fecha: Optional[date]) -> None:
+    """409 si la fecha cae en un mes cerrado: sus totales ya están congelados"""
+    if fecha is None:
+        return
+    periodo = periodo_de(fecha)
+    if db.get(CierreMensual, periodo) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El mes {periodo} está cerrado"
+        )
+
+
+def _limites(inicio: date, fin: date) -> Tuple[datetime, datetime]:
+    """Rango inclusivo de fechas a [inicio, fin + 1 día) en datetime"""
+    return datetime.combine(inicio, datetime.min.time()), datetime.combine(fin + timedelta(days=1), datetime.min.time())
+
+
+def _modelos_venta(db: Session, desde: Optional[datetime]) -> list:
+    return [Venta, VentaArchivo] if incluir_archivo(db, "venta", desde) else [Venta]
+
+
+def sumar_ventas(db: Session, inicio: Optional[date], fin: Optional[date]) -> Tuple[int, float]:
+    """Cantidad y total de ventas en vivo (incluye el archivo si el rango lo alcanza)"""
+    desde = datetime.combine(inicio, datetime.min.time()) if inicio else None
+    hasta = datetime.combine(fin + timedelta(days=1), datetime.min.time()) if fin else None
+    cantidad, total = 0, 0.0
+    for modelo in _modelos_venta(db, desde):
+        query = db.query(func.count(modelo.id), func.coalesce(func.sum(modelo.total), 0))
+        if desde:
+            query = query.filter(modelo.fecha >= desde)
+        if hasta:
+            query = query.filter(modelo.fecha < hasta)
+        n, suma = query.one()
+        cantidad += n
+        total += suma
+    return cantidad, total
+
+
+def sumar_gastos(db: Session, inicio: Optional[date], fin: Optional[date]) -> Tuple[int, float]:
+    """Cantidad y total de gastos en vivo"""
+    query = db.query(func.count(Gasto.id), func.coalesce(func.sum(Gasto.monto), 0))
+    if inicio:
+        query = query.filter(Gasto.fecha >= inicio)
+    if fin:
+        query = query.filter(Gasto.fecha <= fin)
+    cantidad, total = query.one()
+    return cantidad, total
+
+
+def segmentar(inicio: date, fin: date, cerrados: Dict[str, CierreMensual]) -> Tuple[List[CierreMensual], List[Tuple[date, date]]]:
+    """
+    Dividir [inicio, fin] en meses cerrados completos (se leen del cierre) y
+    tramos a calcular en vivo (meses abiertos o cubiertos solo en parte)
+    """
+    cierres: List[CierreMensual] = []
+    vivos: List[Tuple[date, date]] = []
+    dia = inicio
+    while dia <= fin:
+        primero = dia.replace(day=1)
+        ultimo = mes_siguiente(primero) - timedelta(days=1)
+        hasta = min(fin, ultimo)
+        cierre = cerrados.get(periodo_de(dia))
+        if cierre is not None and dia == primero and hasta == ultimo:
+            cierres.append(cierre)
+        elif vivos and vivos[-1][1] + timedelta(days=1) == dia:
+            vivos[-1] = (vivos[-1][0], hasta)
+        else:
+            vivos.append((dia, hasta))
+        dia = hasta + timedelta(days=1)
+    return cierres, vivos
+
+
+def _cierres_en_rango(db: Session, inicio: date, fin: date) -> Dict[str, CierreMensual]:
+    return {
+        c.periodo: c for c in db.query(CierreMensual)
+        .filter(CierreMensual.periodo >= periodo_de(inicio), CierreMensual.periodo <= periodo_de(fin))
+    }
+
+
+def totales_ventas(db: Session, inicio: Optional[date], fin: Optional[date]) -> Tuple[int, float]:
+    """Cantidad y total de ventas: meses cerrados desde el cierre, el resto en vivo"""
+    if not inicio or not fin:
+        return sumar_ventas(db, inicio, fin)
+    cierres, vivos = segmentar(inicio, fin, _cierres_en_rango(db, inicio, fin))
+    cantidad = sum(c.ventas_cantidad for c in cierres)
+    total = sum(c.ventas_total for c in cierres)
+    for desde, hasta in vivos:
+        n, suma = sumar_ventas(db, desde, hasta)
+        cantidad += n
+        total += suma
+    return cantidad, total
+
+
+def totales_gastos(db: Session, inicio: Optional[date], fin: Optional[date]) -> Tuple[int, float]:
+    """Cantidad y total de gastos: meses cerrados desde el cierre, el resto en vivo"""
+    if not inicio or not fin:
+        return sumar_gastos(db, inicio, fin)
+    cierres, vivos = segmentar(inicio, fin, _cierres_en_rango(db, inicio, fin))
+    cantidad = sum(c.gastos_cantidad for c in cierres)
+    total = sum(c.gastos_total for c in cierres)
+    for desde, hasta in vivos:
+        n, suma = sumar_gastos(db, desde, hasta)
+        cantidad += n
+        total += suma
+    return cantidad, total
+
+
+def calcular_resumen(db: Session, primer_dia: date) -> dict:
+    """Resumen de un mes calculado en vivo con consultas agregadas"""
+    fin_mes = mes_siguiente(primer_dia) - timedelta(days=1)
+    desde, hasta = _limites(primer_dia, fin_mes)
+
+    # Ventas por vendedor (tablas activa y de archivo)
+    por_vendedor: Dict[int, list] = {}
+    for modelo in _modelos_venta(db, desde):
+        filas = (
+            db.query(modelo.vendedor_id, func.count(modelo.id), func.coalesce(func.sum(modelo.total), 0))
+            .filter(modelo.fecha >= desde, modelo.fecha < hasta)
+            .group_by(modelo.vendedor_id)
+        )
+        for vendedor_id, n, suma in filas:
+            acumulado = por_vendedor.setdefault(vendedor_id, [0, 0.0])
+            acumulado[0] += n
+            acumulado[1] += suma
+    nombres = dict(
+        db.query(Usuario.id, Usuario.nombre).filter(Usuario.id.in_(list(por_vendedor))).all()
+    ) if por_vendedor else {}
+
+    por_categoria = (
+        db.query(Gasto.categoria, func.count(Gasto.id), func.coalesce(func.sum(Gasto.monto), 0))
+        .filter(Gasto.fecha >= primer_dia, Gasto.fecha <= fin_mes)
+        .group_by(Gasto.categoria)
+        .all()
+    )
+
+    trabajos = 0
+    modelos_trabajo = [Trabajo, TrabajoArchivo] if incluir_archivo(db, "trabajo", desde) else [Trabajo]
+    for modelo in modelos_trabajo:
+        trabajos += db.query(func.count(modelo.id)).filter(
+            modelo.fecha_cancelacion >= desde, modelo.fecha_cancelacion < hasta
+        ).scalar()
+
+    ventas_cantidad = sum(n for n, _ in por_vendedor.values())
+    ventas_total = round(sum(s for _, s in por_vendedor.values()), 2)
+    gastos_cantidad = sum(n for _, n, _ in por_categoria)
+    gastos_total = round(sum(s for _, _, s in por_categoria), 2)
+    return {
+        "periodo": periodo_de(primer_dia),
+        "ventas_cantidad": ventas_cantidad,
+        "ventas_total": ventas_total,
+        "gastos_cantidad": gastos_cantidad,
+        "gastos_total": gastos_total,
+        "margen": round(ventas_total - gastos_total, 2),
+        "trabajos_completados": trabajos,
+        "por_vendedor": [
+            {"vendedor_id": v, "nombre": nombres.get(v), "cantidad": n, "total": round(s, 2)}
+            for v, (n, s) in sorted(por_vendedor.items(), key=lambda item: -item[1][1])
+        ],
+        "por_categoria": [
+            {"categoria": c, "cantidad": n, "total": round(s, 2)}
+            for c, n, s in sorted(por_categoria, key=lambda fila: -fila[2])
+        ],
+    }
+
+
+def resumen_de_cierre(cierre: CierreMensual) -> dict:
+    return {
+        "periodo": cierre.periodo,
+        "cerrado": True,
+        "cerrado_en": cierre.cerrado_en,
+        "ventas_cantidad": cierre.ventas_cantidad,
+        "ventas_total": cierre.ventas_total,
+        "gastos_cantidad": cierre.gastos_cantidad,
+        "gastos_total": cierre.gastos_total,
+        "margen": cierre.margen,
+        "trabajos_completados": cierre.trabajos_completados,
+        "por_vendedor": orjson.loads(cierre.por_vendedor),
+        "por_categoria": orjson.loads(cierre.por_categoria),
+    }
+
+
+def cerrar_mes(db: Session, primer_dia: date, usuario_id: Optional[int] = None) -> CierreMensual:
+    """Calcular y congelar el resumen de un mes terminado"""
+    if primer_dia >= date.today().replace(day=1):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Solo se pueden cerrar meses terminados"
+        )
+    periodo = periodo_de(primer_dia)
+    if db.get(CierreMensual, periodo) is not None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"El mes {periodo} ya está cerrado"
+        )
+
+    resumen = calcular_resumen(db, primer_dia)
+    cierre = CierreMensual(
+        periodo=periodo,
+        ventas_cantidad=resumen["ventas_cantidad"],
+        ventas_total=resumen["ventas_total"],
+        gastos_cantidad=resumen["gastos_cantidad"],
+        gastos_total=resumen["gastos_total"],
+        margen=resumen["margen"],
+        trabajos_completados=resumen["trabajos_completados"],
+        por_vendedor=orjson.dumps(resumen["por_vendedor"]).decode(),
+        por_categoria=orjson.dumps(resumen["por_categoria"]).decode(),
+        cerrado_en=datetime.utcnow(),
+        cerrado_por=usuario_id
+    )
+    db.add(cierre)
+    db.commit()
+    return cierre
@@ -1,8 +1,16 @@
 import os
-from datetime import datetime
+import re
+import hashlib
+import tempfile
 from fastapi import UploadFile, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from app.core.config import settings
 
+# Nombres direccionados por contenido: <sha256 hex>[_<variante>].<ext>
+CONTENT_ADDRESSED_RE = re.compile(r"^[0-9a-f]{32,64}(?:_[a-z0-9]+)?\.[a-z0-9]+$")
+
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
 
 def allowed_file(filename: str) -> bool:
     """Verificar si la extensión del archivo es permitida"""
@@ -12,8 +20,16 @@ def allowed_file(filename: str) -> bool:
     return ext in settings.ALLOWED_EXTENSIONS
 
 
-async def save_upload_file(file: UploadFile) -> str:
-    """Guardar archivo subido y retornar nombre del archivo"""
+def is_content_addressed(filename: str) -> bool:
+    """Verificar si el nombre deriva del contenido (y por tanto es inmutable)"""
+    return bool(CONTENT_ADDRESSED_RE.match(os.path.basename(filename)))
+
+
+def store_upload_file(file: UploadFile) -> str:
+    """
+    Guardar archivo subido leyendo por bloques y retornar su nombre.
+    El nombre es el sha256 del contenido, por lo que es inmutable
+    """
     if not file:
         return None
     
@@ -25,22 +41,51 @@ async def save_upload_file(file: UploadFile) -> str:
     
     # Crear carpeta si no existe
     upload_path = settings.UPLOAD_FOLDER
-    if not os.path.exists(upload_path):
-        os.makedirs(upload_path)
-    
-    # Generar nombre único
-    timestamp = datetime.now().timestamp()
-    filename = f"{timestamp}_{file.filename}"
-    file_path = os.path.join(upload_path, filename)
+    os.makedirs(upload_path, exist_ok=True)
     
-    # Guardar archivo
-    contents = await file.read()
-    with open(file_path, 'wb') as f:
-        f.write(contents)
+    # Copiar a un temporal calculando el hash mientras se escribe
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    digest = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=upload_path, prefix=".upload-")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while chunk := file.file.read(UPLOAD_CHUNK_SIZE):
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_SIZE:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Archivo demasiado grande. Máximo: {settings.MAX_UPLOAD_SIZE} bytes"
+                    )
+                digest.update(chunk)
+                f.write(chunk)
+        
+        filename = f"{digest.hexdigest()}.{ext}"
+        # Mismo contenido, mismo nombre: no se reescribe. Se renueva la fecha
+        # (y la de sus variantes) para que el barrido de huérfanos no borre un
+        # archivo antiguo que vuelve a referenciarse
+        if os.path.exists(os.path.join(upload_path, filename)):
+            os.remove(tmp_path)
+            for name in [filename] + [variant_filename(filename, v) for v in settings.IMAGE_VARIANTS]:
+                try:
+                    os.utime(os.path.join(upload_path, name))
+                except FileNotFoundError:
+                    pass
+        else:
+            os.replace(tmp_path, os.path.join(upload_path, filename))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
     
     return filename
 
 
+async def save_upload_file(file: UploadFile) -> str:
+    """Guardar archivo subido y retornar nombre del archivo"""
+    return await run_in_threadpool(store_upload_file, file)
+
+
 def delete_file(filename: str) -> bool:
     """Eliminar archivo"""
     if not filename:
@@ -51,3 +96,27 @@ def delete_file(filename: str) -> bool:
         os.remove(file_path)
         return True
     return False
+
+
+def variant_filename(filename: str, variant: str) -> str:
+    """Nombre de la variante de una imagen (<hash>_<variante>.<ext>)"""
+    stem, ext = filename.rsplit('.', 1)
+    return f"{stem}_{variant}.{ext}"
+
+
+def original_filename(filename: str) -> str:
+    """Nombre del archivo original a partir de una variante (o el mismo nombre)"""
+    if not is_content_addressed(filename):
+        return filename
+    stem, ext = filename.rsplit('.', 1)
+    return f"{stem.split('_', 1)[0]}.{ext}"
+
+
+def delete_file_and_variants(filename: str) -> bool:
+    """Eliminar archivo junto con sus variantes generadas"""
+    if not filename:
+        return False
+    
+    for variant in settings.IMAGE_VARIANTS:
+        delete_file(variant_filename(filename, variant))
+    return delete_file(filename)
@@ -0,0 +1,88 @@
+import base64
+from datetime import datetime
+from heapq import merge
+from itertools import islice
+from typing import Optional, Tuple
+
+import orjson
+from fastapi import HTTPException, status
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.archivo import TrabajoArchivo, VentaArchivo
+from app.models.trabajo import Trabajo
+from app.models.venta import Venta
+from app.utils.archivo import cortes
+
+# Posición en la línea de tiempo: (fecha, tipo, id), de más reciente a más antigua
+Clave = Tuple[datetime, str, int]
+
+
+def codificar_cursor(clave: Clave) -> str:
+    fecha, tipo, id_ = clave
+    return base64.urlsafe_b64encode(orjson.dumps([fecha.isoformat(), tipo, id_])).decode().rstrip("=")
+
+
+def decodificar_cursor(cursor: str) -> Clave:
+    """Cursor opaco de la página siguiente (400 si no es válido)"""
+    try:
+        fecha, tipo, id_ = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if tipo not in ("trabajo", "venta"):
+            raise ValueError(tipo)
+        return datetime.fromisoformat(fecha), tipo, int(id_)
+    except (ValueError, TypeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor no válido"
+        )
+
+
+def _despues_de(columna_fecha, columna_id, tipo: str, cursor: Optional[Clave]):
+    """Condición keyset: filas posteriores al cursor en el orden (fecha, tipo, id) descendente"""
+    if cursor is None:
+        return None
+    fecha, tipo_cursor, id_ = cursor
+    if tipo < tipo_cursor:
+        return columna_fecha <= fecha
+    if tipo > tipo_cursor:
+        return columna_fecha < fecha
+    return or_(columna_fecha < fecha, and_(columna_fecha == fecha, columna_id < id_))
+
+
+def historial_cliente(db: Session, cliente_id: int, limite: int, cursor: Optional[str] = None) -> dict:
+    """
+    Trabajos y ventas del cliente mezclados por fecha. Cada tabla aporta como
+    mucho limite + 1 filas ya ordenadas (índice cliente_id, fecha), así que el
+    coste no depende de la antigüedad del cliente. Los trabajos sin
+    fecha_creacion no tienen posición en la línea de tiempo y se omiten
+    """
+    clave_cursor = decodificar_cursor(cursor) if cursor else None
+    archivo = cortes(db)
+    n = limite + 1
+
+    fuentes = []
+    for modelo in [Trabajo] + ([TrabajoArchivo] if "trabajo" in archivo else []):
+        query = db.query(modelo).filter(modelo.cliente_id == cliente_id, modelo.fecha_creacion.isnot(None))
+        condicion = _despues_de(modelo.fecha_creacion, modelo.id, "trabajo", clave_cursor)
+        if condicion is not None:
+            query = query.filter(condicion)
+        filas = query.order_by(modelo.fecha_creacion.desc(), modelo.id.desc()).limit(n).all()
+        fuentes.append([((t.fecha_creacion, "trabajo", t.id), t) for t in filas])
+
+    for modelo in [Venta] + ([VentaArchivo] if "venta" in archivo else []):
+        query = db.query(modelo).filter(modelo.cliente_id == cliente_id).options(selectinload(modelo.detalles))
+        condicion = _despues_de(modelo.fecha, modelo.id, "venta", clave_cursor)
+        if condicion is not None:
+            query = query.filter(condicion)
+        filas = query.order_by(modelo.fecha.desc(), modelo.id.desc()).limit(n).all()
+        fuentes.append([((v.fecha, "venta", v.id), v) for v in filas])
+
+    pagina = list(islice(merge(*fuentes, key=lambda item: item[0], reverse=True), n))
+    siguiente = codificar_cursor(pagina[limite - 1][0]) if len(pagina) > limite else None
+    return {
+        "items": [
+            {"tipo": clave[1], "fecha": clave[0], clave[1]: fila}
+            for clave, fila in pagina[:limite]
+        ],
+        "siguiente": siguiente
+    }
@@ -0,0 +1,34 @@
+import os
+import tempfile
+
+from app.core.config import settings
+from app.core.jobs import tarea
+from app.utils.files import variant_filename
+
+
+@tarea("imagenes.variantes")
+def generate_variants(filename: str) -> None:
+    """Generar variantes redimensionadas de una imagen (tarea en segundo plano)"""
+    # Pillow solo se necesita aquí; se importa al ejecutar la tarea
+    from PIL import Image
+
+    source_path = os.path.join(settings.UPLOAD_FOLDER, filename)
+    # Los errores llegan al ejecutor de tareas, que reintenta con espera
+    with Image.open(source_path) as image:
+        image_format = image.format
+        for variant, max_side in settings.IMAGE_VARIANTS.items():
+            target_path = os.path.join(settings.UPLOAD_FOLDER, variant_filename(filename, variant))
+            # Los nombres derivan del contenido: si existe, ya está generada
+            if os.path.exists(target_path):
+                continue
+
+            resized = image.copy()
+            resized.thumbnail((max_side, max_side))
+            fd, tmp_path = tempfile.mkstemp(dir=settings.UPLOAD_FOLDER, prefix=".variant-")
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    resized.save(f, format=image_format)
+                os.replace(tmp_path, target_path)
+            except BaseException:
+                os.remove(tmp_path)
+                raise
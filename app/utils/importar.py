@@ -0,0 +1,227 @@
+import codecs
+import csv
+import re
+from datetime import date, datetime
+from typing import AsyncIterator, List, Optional, Tuple, Type, Union
+
+import orjson
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+
+from app.core.config import settings
+
+# Content-Type -> formato de importación
+FORMATOS = {
+    "text/csv": "csv",
+    "application/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+    "application/x-jsonlines": "ndjson",
+}
+
+# (número de registro, datos o mensaje de error)
+Registro = Tuple[int, Union[dict, str]]
+
+
+def detectar_formato(request: Request, formato: Optional[str] = None) -> str:
+    """Formato del cuerpo: ?formato= o Content-Type (415 si no se reconoce)"""
+    if formato is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        formato = FORMATOS.get(content_type)
+    if formato not in ("csv", "ndjson"):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Formato no soportado: enviar CSV (text/csv) o NDJSON (application/x-ndjson)"
+        )
+    return formato
+
+
+async def iter_lines(request: Request, encoding: str = "utf-8-sig") -> AsyncIterator[str]:
+    """Líneas del cuerpo a medida que llegan (sin cargarlo entero en memoria)"""
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)()
+    except LookupError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Codificación no válida: {encoding}"
+        )
+
+    pendiente = ""
+    try:
+        async for chunk in request.stream():
+            pendiente += decoder.decode(chunk)
+            *lineas, pendiente = pendiente.split("\n")
+            for linea in lineas:
+                yield linea + "\n"
+        pendiente += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"El archivo no está en {encoding} (usar ?codificacion=)"
+        )
+    if pendiente:
+        yield pendiente
+
+
+async def _lotes_csv(
+    lineas: AsyncIterator[str], tamano: int, separador: str, conservar_vacias: bool = False
+) -> AsyncIterator[List[Registro]]:
+    cabecera: Optional[List[str]] = None
+    numero = 0
+    buffer: List[str] = []
+    comillas = 0
+
+    def parsear(buffer: List[str]) -> List[Registro]:
+        nonlocal cabecera, numero
+        registros = []
+        for valores in csv.reader(buffer, delimiter=separador):
+            if not any(v.strip() for v in valores):
+                continue
+            if cabecera is None:
+                cabecera = [c.strip() for c in valores]
+                continue
+            numero += 1
+            if len(valores) != len(cabecera):
+                registros.append((numero, f"Se esperaban {len(cabecera)} columnas y hay {len(valores)}"))
+                continue
+            if conservar_vacias:
+                # Todas las columnas presentes; celda vacía = None
+                registros.append((numero, {c: (v if v.strip() else None) for c, v in zip(cabecera, valores)}))
+            else:
+                # Celda vacía = campo no enviado: al actualizar no pisa el valor existente
+                registros.append((numero, {c: v for c, v in zip(cabecera, valores) if v.strip()}))
+        return registros
+
+    async for linea in lineas:
+        buffer.append(linea)
+        comillas += linea.count('"')
+        # Solo se corta con comillas pares: un campo entre comillas puede tener saltos de línea
+        if len(buffer) >= tamano and comillas % 2 == 0:
+            registros = parsear(buffer)
+            buffer, comillas = [], 0
+            if registros:
+                yield registros
+    if buffer:
+        registros = parsear(buffer)
+        if registros:
+            yield registros
+
+
+async def _lotes_ndjson(lineas: AsyncIterator[str], tamano: int) -> AsyncIterator[List[Registro]]:
+    numero = 0
+    lote: List[Registro] = []
+    async for linea in lineas:
+        if not linea.strip():
+            continue
+        numero += 1
+        try:
+            datos = orjson.loads(linea)
+        except orjson.JSONDecodeError:
+            lote.append((numero, "JSON no válido"))
+        else:
+            lote.append((numero, datos if isinstance(datos, dict) else "Se esperaba un objeto JSON"))
+        if len(lote) >= tamano:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+def leer_lotes(
+    request: Request,
+    formato: str,
+    tamano: Optional[int] = None,
+    separador: str = ",",
+    encoding: str = "utf-8-sig",
+    conservar_vacias: bool = False
+) -> AsyncIterator[List[Registro]]:
+    """
+    Registros del cuerpo (CSV con cabecera o NDJSON) agrupados en lotes. En CSV
+    las celdas vacías se omiten del registro salvo con conservar_vacias
+    """
+    tamano = tamano or settings.IMPORT_BATCH_SIZE
+    lineas = iter_lines(request, encoding)
+    if formato == "csv":
+        return _lotes_csv(lineas, tamano, separador, conservar_vacias)
+    return _lotes_ndjson(lineas, tamano)
+
+
+FORMATOS_FECHA = ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d", "%d/%m/%y")
+
+
+def parsear_fecha(valor: Optional[str], formato: Optional[str] = None) -> Optional[date]:
+    """Fecha de un extracto: formato indicado o los habituales (ISO, dd/mm/aaaa...)"""
+    if valor is None:
+        return None
+    valor = valor.strip()
+    for fmt in (formato,) if formato else FORMATOS_FECHA:
+        try:
+            return datetime.strptime(valor, fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Fecha no válida: {valor}")
+
+
+def parsear_numero(valor: Optional[str], separador_decimal: str = ".") -> Optional[float]:
+    """Importe con símbolos y separadores de miles ($ 1.234,56 / -1,234.56)"""
+    if valor is None:
+        return None
+    limpio = re.sub(r"[^\d,.\-()]", "", valor)
+    negativo = limpio.startswith("-") or limpio.endswith("-") or limpio.startswith("(")
+    limpio = limpio.strip("-()")
+    miles = "," if separador_decimal == "." else "."
+    limpio = limpio.replace(miles, "").replace(separador_decimal, ".")
+    try:
+        numero = float(limpio)
+    except ValueError:
+        raise ValueError(f"Importe no válido: {valor}")
+    return -numero if negativo else numero
+
+
+def formatear_error(exc: ValidationError) -> str:
+    """Mensaje compacto de un error de validación (campo: motivo; ...)"""
+    return "; ".join(
+        f"{'.'.join(str(p) for p in e['loc']) or 'fila'}: {e['msg']}" for e in exc.errors()
+    )
+
+
+class ResumenImportacion:
+    """Contadores y errores por fila de una importación (errores acotados)"""
+
+    def __init__(self, max_errores: Optional[int] = None) -> None:
+        self.max_errores = max_errores if max_errores is not None else settings.IMPORT_MAX_ERRORS
+        self.procesadas = 0
+        self.contadores: dict = {}
+        self.errores: List[dict] = []
+        self.total_errores = 0
+
+    def contar(self, clave: str, cantidad: int = 1) -> None:
+        self.contadores[clave] = self.contadores.get(clave, 0) + cantidad
+
+    def error(self, fila: int, mensaje: str) -> None:
+        self.total_errores += 1
+        if len(self.errores) < self.max_errores:
+            self.errores.append({"fila": fila, "error": mensaje})
+
+    def validar(self, schema: Type[BaseModel], registros: List[Registro]) -> List[Tuple[int, BaseModel]]:
+        """Validar un lote con el schema; los inválidos quedan como errores"""
+        validos = []
+        for fila, datos in registros:
+            self.procesadas += 1
+            if isinstance(datos, str):
+                self.error(fila, datos)
+                continue
+            try:
+                validos.append((fila, schema.model_validate(datos)))
+            except ValidationError as exc:
+                self.error(fila, formatear_error(exc))
+        return validos
+
+    def as_dict(self) -> dict:
+        return {
+            "procesadas": self.procesadas,
+            **self.contadores,
+            "total_errores": self.total_errores,
+            "errores": self.errores,
+        }
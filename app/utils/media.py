@@ -0,0 +1,200 @@
+import os
+import stat
+import mimetypes
+from email.utils import formatdate, parsedate_to_datetime
+from typing import List, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from app.core.config import settings
+from app.utils.files import is_content_addressed
+
+CHUNK_SIZE = 64 * 1024
+
+
+def resolve_media_path(path: str) -> Optional[str]:
+    """Resolver ruta relativa dentro de UPLOAD_FOLDER (None si escapa de la carpeta)"""
+    root = os.path.realpath(settings.UPLOAD_FOLDER)
+    full_path = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, full_path]) != root:
+        return None
+    return full_path
+
+
+def build_etag(filename: str, stat_result: os.stat_result) -> str:
+    """ETag fuerte: hash del nombre si es por contenido, si no tamaño + mtime"""
+    name = os.path.basename(filename)
+    if is_content_addressed(name):
+        return f'"{name.split(".", 1)[0]}"'
+    return f'"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"'
+
+
+def cache_control_for(filename: str) -> str:
+    """Cache-Control según si el nombre es inmutable o no"""
+    if is_content_addressed(filename):
+        return f"public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+    return f"public, max-age={settings.MEDIA_CACHE_MAX_AGE}"
+
+
+def etag_matches(header_value: str, etag: str, weak: bool = True) -> bool:
+    """Comparar If-None-Match / If-Range contra el ETag actual"""
+    if header_value.strip() == "*":
+        return True
+    for candidate in header_value.split(","):
+        candidate = candidate.strip()
+        if weak and candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def not_modified(request_headers: Headers, etag: str, mtime: float) -> bool:
+    """Evaluar If-None-Match (prioritario) o If-Modified-Since"""
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(mtime) <= int(since)
+    return False
+
+
+def parse_range(range_header: str, size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Parsear cabecera Range (bytes=...). Retorna lista de (inicio, fin) inclusivos,
+    lista vacía si ningún rango es satisfacible o None si la cabecera es inválida
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec:
+        return None
+
+    ranges = []
+    for part in spec.split(","):
+        start_str, sep, end_str = part.strip().partition("-")
+        if not sep:
+            return None
+        try:
+            if start_str == "":
+                # Sufijo: últimos N bytes
+                length = int(end_str)
+                if length <= 0:
+                    continue
+                start, end = max(size - length, 0), size - 1
+            else:
+                start = int(start_str)
+                end = int(end_str) if end_str else size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        if start > end:
+            return None
+        ranges.append((start, min(end, size - 1)))
+    return ranges
+
+
+class MediaFileResponse(Response):
+    """
+    Respuesta de archivo con soporte de rangos. Usa la extensión ASGI
+    http.response.zerocopysend (sendfile) cuando el servidor la ofrece
+    """
+
+    def __init__(
+        self,
+        path: str,
+        stat_result: os.stat_result,
+        headers: dict,
+        status_code: int = 200,
+        start: int = 0,
+        end: Optional[int] = None,
+        media_type: Optional[str] = None,
+    ) -> None:
+        self.path = path
+        self.status_code = status_code
+        self.start = start
+        self.end = stat_result.st_size - 1 if end is None else end
+        self.media_type = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+        self.background = None
+        self.init_headers(headers)
+        self.headers["content-length"] = str(self.end - self.start + 1)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        count = self.end - self.start + 1
+        if scope["method"] == "HEAD" or count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if "http.response.zerocopysend" in scope.get("extensions", {}):
+            with open(self.path, "rb") as f:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": f.fileno(),
+                    "offset": self.start,
+                    "count": count,
+                    "more_body": False,
+                })
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as f:
+            await f.seek(self.start)
+            remaining = count
+            while remaining > 0:
+                chunk = await f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+        if remaining > 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+def media_response(full_path: str, request_headers: Headers) -> Response:
+    """Construir la respuesta (200, 206, 304 o 416) para un archivo de UPLOAD_FOLDER"""
+    stat_result = os.stat(full_path)
+    if not stat.S_ISREG(stat_result.st_mode):
+        raise FileNotFoundError(full_path)
+
+    etag = build_etag(full_path, stat_result)
+    headers = {
+        "etag": etag,
+        "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "cache-control": cache_control_for(full_path),
+        "accept-ranges": "bytes",
+    }
+
+    if not_modified(request_headers, etag, stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    size = stat_result.st_size
+    range_header = request_headers.get("range")
+    if_range = request_headers.get("if-range")
+    if range_header and (if_range is None or etag_matches(if_range, etag, weak=False)):
+        ranges = parse_range(range_header, size)
+        if ranges == []:
+            headers["content-range"] = f"bytes */{size}"
+            return Response(status_code=416, headers=headers)
+        # Solo se atiende un rango; múltiples rangos devuelven el archivo completo
+        if ranges and len(ranges) == 1:
+            start, end = ranges[0]
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            return MediaFileResponse(full_path, stat_result, headers, status_code=206, start=start, end=end)
+
+    return MediaFileResponse(full_path, stat_result, headers)
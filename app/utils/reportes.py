@@ -0,0 +1,159 @@
+import time
+from datetime import date, datetime, timedelta
+from typing import List, Tuple
+
+from sqlalchemy import case, desc, func, select, union_all
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.expression import FunctionElement
+from sqlalchemy.types import Float
+
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.models.archivo import DetalleVentaArchivo, TrabajoArchivo, VentaArchivo
+from app.models.producto import Producto
+from app.models.trabajo import Trabajo
+from app.models.usuario import Usuario
+from app.models.venta import DetalleVenta, Venta
+from app.utils.archivo import incluir_archivo
+
+# Resultados por parámetros; la versión es la ventana de REPORTS_CACHE_TTL
+reportes_cache = LRUCache(settings.REPORTS_CACHE_SIZE)
+
+
+class segundos_entre(FunctionElement):
+    """Segundos entre dos DateTime (SQL propio de cada motor)"""
+    type = Float()
+    inherit_cache = True
+    name = "segundos_entre"
+
+
+@compiles(segundos_entre)
+def _segundos_mysql(element, compiler, **kw):
+    inicio, fin = list(element.clauses)
+    return f"TIMESTAMPDIFF(SECOND, {compiler.process(inicio, **kw)}, {compiler.process(fin, **kw)})"
+
+
+@compiles(segundos_entre, "sqlite")
+def _segundos_sqlite(element, compiler, **kw):
+    inicio, fin = list(element.clauses)
+    return f"((julianday({compiler.process(fin, **kw)}) - julianday({compiler.process(inicio, **kw)})) * 86400.0)"
+
+
+@compiles(segundos_entre, "postgresql")
+def _segundos_postgresql(element, compiler, **kw):
+    inicio, fin = list(element.clauses)
+    return f"EXTRACT(EPOCH FROM ({compiler.process(fin, **kw)} - {compiler.process(inicio, **kw)}))"
+
+
+def version_cache() -> int:
+    """Ventana de tiempo actual: al cambiar, las entradas anteriores caducan"""
+    return int(time.time() // max(settings.REPORTS_CACHE_TTL, 1))
+
+
+def rango_reporte(inicio: date = None, fin: date = None) -> Tuple[date, date]:
+    """Rango inclusivo del reporte (por defecto los últimos 30 días)"""
+    fin = fin or date.today()
+    return inicio or fin - timedelta(days=29), fin
+
+
+def _limites(inicio: date, fin: date) -> Tuple[datetime, datetime]:
+    return datetime.combine(inicio, datetime.min.time()), datetime.combine(fin + timedelta(days=1), datetime.min.time())
+
+
+def productos_top(db: Session, inicio: date, fin: date, limite: int, orden: str) -> List[dict]:
+    """Cantidad e importe vendidos por producto en una sola consulta agregada"""
+    desde, hasta = _limites(inicio, fin)
+    pares = [(DetalleVenta, Venta)]
+    if incluir_archivo(db, "venta", desde):
+        pares.append((DetalleVentaArchivo, VentaArchivo))
+    
+    lineas = [
+        select(
+            detalle.producto_id.label("producto_id"),
+            detalle.cantidad.label("cantidad"),
+            detalle.subtotal.label("subtotal"),
+            detalle.venta_id.label("venta_id")
+        )
+        .join(venta, venta.id == detalle.venta_id)
+        .where(venta.fecha >= desde, venta.fecha < hasta, detalle.producto_id.isnot(None))
+        for detalle, venta in pares
+    ]
+    v = (union_all(*lineas) if len(lineas) > 1 else lineas[0]).subquery("v")
+    
+    cantidad = func.sum(v.c.cantidad).label("cantidad")
+    total = func.sum(v.c.subtotal).label("total")
+    filas = db.execute(
+        select(v.c.producto_id, Producto.nombre, cantidad, total, func.count(func.distinct(v.c.venta_id)))
+        .outerjoin(Producto, Producto.id == v.c.producto_id)
+        .group_by(v.c.producto_id, Producto.nombre)
+        .order_by(desc(cantidad if orden == "cantidad" else total), v.c.producto_id)
+        .limit(limite)
+    ).all()
+    return [
+        {"producto_id": p, "nombre": nombre, "cantidad": int(n), "total": round(float(s), 2), "ventas": v}
+        for p, nombre, n, s, v in filas
+    ]
+
+
+def productividad_mecanicos(db: Session, inicio: date, fin: date) -> List[dict]:
+    """
+    Trabajos completados, tiempo de ciclo (media, p50, p90) e ingresos por
+    mecánico en una sola consulta. Los percentiles son de rango más cercano:
+    el menor tiempo cuya posición en el orden alcanza p * n
+    """
+    desde, hasta = _limites(inicio, fin)
+    modelos = [Trabajo, TrabajoArchivo] if incluir_archivo(db, "trabajo", desde) else [Trabajo]
+    
+    completados = [
+        select(
+            modelo.mecanico_id.label("mecanico_id"),
+            segundos_entre(modelo.fecha_creacion, modelo.fecha_cancelacion).label("segundos"),
+            func.coalesce(modelo.costo, 0).label("costo")
+        )
+        .where(
+            modelo.fecha_cancelacion >= desde,
+            modelo.fecha_cancelacion < hasta,
+            modelo.fecha_creacion.isnot(None),
+            modelo.estado.in_(("completado", "pagado"))
+        )
+        for modelo in modelos
+    ]
+    t = (union_all(*completados) if len(completados) > 1 else completados[0]).subquery("t")
+    r = select(
+        t.c.mecanico_id,
+        t.c.segundos,
+        t.c.costo,
+        func.row_number().over(partition_by=t.c.mecanico_id, order_by=t.c.segundos).label("posicion"),
+        func.count().over(partition_by=t.c.mecanico_id).label("n")
+    ).subquery("r")
+    
+    def percentil(p: float):
+        return func.min(case((r.c.posicion >= r.c.n * p, r.c.segundos)))
+    
+    trabajos = func.count().label("trabajos")
+    filas = db.execute(
+        select(
+            r.c.mecanico_id, Usuario.nombre, trabajos,
+            func.avg(r.c.segundos), percentil(0.5), percentil(0.9), func.sum(r.c.costo)
+        )
+        .outerjoin(Usuario, Usuario.id == r.c.mecanico_id)
+        .group_by(r.c.mecanico_id, Usuario.nombre)
+        .order_by(desc(trabajos), r.c.mecanico_id)
+    ).all()
+    
+    def horas(segundos) -> float:
+        return round(float(segundos) / 3600, 2) if segundos is not None else None
+    
+    return [
+        {
+            "mecanico_id": m,
+            "nombre": nombre,
+            "trabajos_completados": n,
+            "horas_promedio": horas(media),
+            "horas_p50": horas(p50),
+            "horas_p90": horas(p90),
+            "ingresos": round(float(ingresos), 2)
+        }
+        for m, nombre, n, media, p50, p90, ingresos in filas
+    ]
@@ -0,0 +1,63 @@
+from typing import Dict, Iterable, List
+
+from sqlalchemy import case, or_, update
+from sqlalchemy.orm import Session
+
+from app.models.producto import Producto
+
+
+def cantidades_por_producto(detalles: Iterable) -> Dict[int, int]:
+    """Sumar cantidades por producto_id (ignora detalles sin producto)"""
+    cantidades: Dict[int, int] = {}
+    for detalle in detalles:
+        if detalle.producto_id is not None:
+            cantidades[detalle.producto_id] = cantidades.get(detalle.producto_id, 0) + detalle.cantidad
+    return cantidades
+
+
+def descontar_stock(db: Session, cantidades: Dict[int, int]) -> bool:
+    """
+    Descontar stock de varios productos con un único UPDATE condicional
+    (stock = stock - n WHERE stock >= n). Sin lectura previa: dos ventas
+    concurrentes no pueden dejar stock negativo. Los productos con stock
+    NULL no llevan inventario y no se limitan.
+    Retorna False si algún producto no existe o no alcanza (hacer rollback)
+    """
+    if not cantidades:
+        return True
+
+    cantidad = case(cantidades, value=Producto.id)
+    result = db.execute(
+        update(Producto)
+        .where(Producto.id.in_(list(cantidades)))
+        .where(or_(Producto.stock.is_(None), Producto.stock >= cantidad))
+        .values(stock=Producto.stock - cantidad)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == len(cantidades)
+
+
+def reponer_stock(db: Session, cantidades: Dict[int, int]) -> None:
+    """Devolver al stock las cantidades indicadas (un único UPDATE)"""
+    if not cantidades:
+        return
+
+    cantidad = case(cantidades, value=Producto.id)
+    db.execute(
+        update(Producto)
+        .where(Producto.id.in_(list(cantidades)))
+        .values(stock=Producto.stock + cantidad)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def productos_sin_stock(db: Session, cantidades: Dict[int, int]) -> List[int]:
+    """IDs de productos inexistentes o sin stock suficiente (para el mensaje de error)"""
+    disponibles = dict(
+        db.query(Producto.id, Producto.stock).filter(Producto.id.in_(list(cantidades))).all()
+    )
+    return [
+        producto_id for producto_id, n in cantidades.items()
+        if producto_id not in disponibles
+        or (disponibles[producto_id] is not None and disponibles[producto_id] < n)
+    ]
@@ -0,0 +1,137 @@
+import os
+import time
+import asyncio
+import logging
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.jobs import tarea
+from app.models.archivo import TrabajoArchivo
+from app.models.producto import Producto
+from app.models.trabajo import Trabajo
+from app.models.usuario import Usuario
+from app.utils.files import delete_file_and_variants, original_filename
+
+logger = logging.getLogger(__name__)
+
+# Columnas que referencian archivos de UPLOAD_FOLDER
+UPLOAD_COLUMNS = [Producto.foto, Trabajo.foto, TrabajoArchivo.foto, Usuario.imagen]
+
+
+def is_referenced(db: Session, filename: str) -> bool:
+    """Verificar si algún registro sigue apuntando al archivo"""
+    for column in UPLOAD_COLUMNS:
+        if db.query(column).filter(column == filename).first() is not None:
+            return True
+    return False
+
+
+def referenced_among(db: Session, filenames: List[str]) -> set:
+    """Subconjunto de filenames referenciado por alguna columna (una consulta IN por columna)"""
+    referenced = set()
+    for column in UPLOAD_COLUMNS:
+        rows = db.query(column).filter(column.in_(filenames)).distinct().all()
+        referenced.update(r[0] for r in rows)
+    return referenced
+
+
+@tarea("uploads.limpiar")
+def cleanup_unreferenced_upload(filename: str) -> None:
+    """Eliminar un archivo reemplazado si ya nadie lo referencia (tarea en segundo plano)"""
+    if not filename:
+        return
+
+    # Los errores se propagan: el runner de tareas reintenta con backoff
+    db = SessionLocal()
+    try:
+        if not is_referenced(db, filename):
+            delete_file_and_variants(filename)
+    finally:
+        db.close()
+
+
+def _batches(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+# Temporales propios (subidas y variantes interrumpidas); otros archivos
+# ocultos como .gitkeep no se tocan
+TEMP_PREFIXES = (".upload-", ".variant-")
+
+
+def sweep_orphan_uploads(grace_period: Optional[int] = None, batch_size: Optional[int] = None) -> dict:
+    """
+    Eliminar archivos de UPLOAD_FOLDER que ningún registro referencia.
+    Recorre la carpeta por lotes (sin cargar el listado completo) y solo
+    borra archivos más antiguos que el periodo de gracia
+    """
+    grace_period = settings.UPLOAD_GC_GRACE_PERIOD if grace_period is None else grace_period
+    batch_size = batch_size or settings.UPLOAD_GC_BATCH_SIZE
+    cutoff = time.time() - grace_period
+    report = {"revisados": 0, "eliminados": 0, "bytes_liberados": 0}
+
+    if not os.path.isdir(settings.UPLOAD_FOLDER):
+        return report
+
+    db = SessionLocal()
+    try:
+        with os.scandir(settings.UPLOAD_FOLDER) as entries:
+            files = (
+                e for e in entries
+                if e.is_file(follow_symlinks=False) and (not e.name.startswith(".") or e.name.startswith(TEMP_PREFIXES))
+            )
+            for batch in _batches(files, batch_size):
+                report["revisados"] += len(batch)
+                candidates = []
+                for entry in batch:
+                    try:
+                        stat_result = entry.stat(follow_symlinks=False)
+                    except FileNotFoundError:
+                        continue
+                    if stat_result.st_mtime < cutoff:
+                        candidates.append((entry, stat_result.st_size))
+                if not candidates:
+                    continue
+
+                # Temporales de subidas interrumpidas: nunca están referenciados
+                originals = [original_filename(e.name) for e, _ in candidates if not e.name.startswith(".")]
+                referenced = referenced_among(db, originals) if originals else set()
+
+                for entry, size in candidates:
+                    if not entry.name.startswith(".") and original_filename(entry.name) in referenced:
+                        continue
+                    try:
+                        # Una subida con el mismo contenido renueva la fecha
+                        # mientras se consultaban las referencias
+                        if os.stat(entry.path).st_mtime >= cutoff:
+                            continue
+                        os.remove(entry.path)
+                    except FileNotFoundError:
+                        continue
+                    report["eliminados"] += 1
+                    report["bytes_liberados"] += size
+    finally:
+        db.close()
+
+    return report
+
+
+async def run_upload_gc_periodically() -> None:
+    """Ejecutar el barrido de huérfanos cada UPLOAD_GC_INTERVAL segundos"""
+    while True:
+        await asyncio.sleep(settings.UPLOAD_GC_INTERVAL)
+        try:
+            report = await run_in_threadpool(sweep_orphan_uploads)
+            logger.info(
+                "Barrido de uploads: %(revisados)d revisados, %(eliminados)d eliminados, "
+                "%(bytes_liberados)d bytes liberados", report
+            )
+        except Exception:
+            logger.exception("Error en el barrido de uploads huérfanos")
@@ -0,0 +1,124 @@
+"""
+Benchmark del archivo de ventas y trabajos: tiempos de las consultas del día a
+día (listados de hoy, totales del mes, dashboards) antes y después de mover los
+meses cerrados a las tablas *_archivo, y de una consulta histórica que une ambas.
+
+Uso:
+    python benchmarks/bench_archive.py [ventas] [meses_activos] [repeticiones]
+
+Usa DATABASE_URI si está definida (debe ser una base de pruebas: se insertan
+datos); si no, una base SQLite temporal.
+"""
+import os
+import sys
+import random
+import tempfile
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URI", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+os.environ.setdefault("CATALOG_VERSION_FILE", os.path.join(tempfile.mkdtemp(), "catalogo.version"))
+
+from fastapi.testclient import TestClient  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+
+import main  # noqa: E402
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.core.security import create_access_token, get_password_hash  # noqa: E402
+from app.models import Base, DetalleVenta, Trabajo, Usuario, Venta  # noqa: E402
+from app.utils.archivo import archivar  # noqa: E402
+
+DIAS_HISTORIA = 3 * 365
+
+
+def poblar(ventas: int) -> dict:
+    """Ventas (2 detalles cada una) y trabajos repartidos en los últimos 3 años"""
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    usuarios = [
+        Usuario(correo=f"bench-{rol}@taller.local", nombre=rol, rol=rol, contraseña=get_password_hash("x"))
+        for rol in ("admin", "mecanico", "usuario")
+    ]
+    db.add_all(usuarios)
+    db.commit()
+    admin, mecanico, cliente = (u.id for u in usuarios)
+
+    ahora = datetime.utcnow()
+    rnd = random.Random(42)
+    trabajos = ventas // 4
+    db.execute(insert(Trabajo), [
+        {"descripcion": f"Trabajo {i}", "estado": "pagado" if i % 10 else "pendiente",
+         "mecanico_id": mecanico, "cliente_id": cliente, "costo": 100.0,
+         "fecha_creacion": ahora - timedelta(days=rnd.uniform(0, DIAS_HISTORIA))}
+        for i in range(trabajos)
+    ])
+    for inicio in range(0, ventas, 5000):
+        n = min(5000, ventas - inicio)
+        db.execute(insert(Venta), [
+            {"id": inicio + i + 1, "fecha": ahora - timedelta(days=rnd.uniform(0, DIAS_HISTORIA)),
+             "total": 50.0, "cliente_id": cliente, "vendedor_id": admin}
+            for i in range(n)
+        ])
+        db.execute(insert(DetalleVenta), [
+            {"venta_id": inicio + i // 2 + 1, "cantidad": 1, "precio_unitario": 25.0, "subtotal": 25.0}
+            for i in range(n * 2)
+        ])
+        db.commit()
+    db.close()
+    return {
+        rol: {"Authorization": "Bearer " + create_access_token({"sub": str(uid)})}
+        for rol, uid in (("admin", admin), ("mecanico", mecanico), ("usuario", cliente))
+    }
+
+
+def medir(client: TestClient, consultas: dict, tokens: dict, repeticiones: int) -> dict:
+    resultados = {}
+    for nombre, (url, rol) in consultas.items():
+        tiempos = []
+        for _ in range(repeticiones):
+            start = time.perf_counter()
+            response = client.get(url, headers=tokens[rol])
+            tiempos.append((time.perf_counter() - start) * 1000)
+            assert response.status_code == 200, (url, response.status_code)
+        resultados[nombre] = statistics.median(tiempos)
+    return resultados
+
+
+def main_bench() -> None:
+    ventas = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    meses = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    repeticiones = int(sys.argv[3]) if len(sys.argv) > 3 else 20
+
+    print(f"Poblando {ventas} ventas y {ventas // 4} trabajos en {DIAS_HISTORIA} días...")
+    tokens = poblar(ventas)
+    client = TestClient(main.app)
+
+    inicio_mes = date.today().replace(day=1).isoformat()
+    hace_un_anio = (date.today() - timedelta(days=365)).isoformat()
+    consultas = {
+        "ventas de hoy": ("/api/v1/ventas/", "admin"),
+        "total de hoy": ("/api/v1/ventas/total", "admin"),
+        "ventas del mes": (f"/api/v1/ventas/?fecha_inicio={inicio_mes}", "admin"),
+        "total del mes": (f"/api/v1/ventas/total?fecha_inicio={inicio_mes}", "admin"),
+        "trabajos activos": ("/api/v1/trabajos/?estado=pendiente", "admin"),
+        "dashboard admin": ("/api/v1/dashboard/admin", "admin"),
+        "dashboard mecánico": ("/api/v1/dashboard/mecanico", "mecanico"),
+        "total último año (histórico)": (f"/api/v1/ventas/total?fecha_inicio={hace_un_anio}", "admin"),
+    }
+
+    antes = medir(client, consultas, tokens, repeticiones)
+    start = time.perf_counter()
+    resultado = archivar(meses=meses)
+    print(f"Archivado en {time.perf_counter() - start:.1f} s: {resultado}")
+    despues = medir(client, consultas, tokens, repeticiones)
+
+    print(f"\n{'consulta':<30} {'antes (ms)':>11} {'después (ms)':>13} {'mejora':>8}")
+    for nombre in consultas:
+        print(f"{nombre:<30} {antes[nombre]:>11.1f} {despues[nombre]:>13.1f} {antes[nombre] / despues[nombre]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main_bench()
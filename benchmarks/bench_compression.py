@@ -0,0 +1,49 @@
+"""
+Benchmark de compresión: CPU por respuesta contra bytes ahorrados para los
+listados grandes (productos, ventas, trabajos) con gzip y brotli.
+
+Uso:
+    python benchmarks/bench_compression.py [filas] [repeticiones]
+
+No necesita base de datos: reutiliza las filas de bench_serialization.
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bench_serialization import build_rows
+
+from app.core.compression import GzipEncoder, BrotliEncoder, brotli
+from app.core.responses import orm_response
+
+
+def compress(encoder, body: bytes) -> bytes:
+    return encoder.compress(body) + encoder.finish()
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    variants = [(f"gzip-{level}", lambda level=level: GzipEncoder(level)) for level in (1, 4, 6, 9)]
+    if brotli is not None:
+        variants += [(f"br-{quality}", lambda quality=quality: BrotliEncoder(quality)) for quality in (1, 4, 6, 11)]
+    else:
+        print("(brotli no instalado: solo gzip)")
+
+    rows = build_rows(n)
+    for endpoint in ("listar_productos", "listar_ventas", "listar_trabajos"):
+        _, adapter, data = rows[endpoint]
+        body = orm_response(adapter, data).body
+        print(f"\n{endpoint}: {len(body)} bytes sin comprimir ({n} filas)")
+        print(f"{'codificación':<12} {'bytes':>10} {'ahorro':>8} {'ms':>8} {'MB/s':>8}")
+        for name, factory in variants:
+            size = len(compress(factory(), body))
+            seconds = min(timeit.repeat(lambda: compress(factory(), body), number=repeat, repeat=3)) / repeat
+            print(f"{name:<12} {size:>10} {1 - size / len(body):>7.1%} {seconds * 1000:>8.2f} "
+                  f"{len(body) / seconds / 1e6:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
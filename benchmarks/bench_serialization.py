@@ -0,0 +1,89 @@
+"""
+Benchmark de serialización de listados: ruta actual (response_model +
+jsonable_encoder + json.dumps) contra la ruta rápida (TypeAdapter.dump_json).
+
+Uso:
+    python benchmarks/bench_serialization.py [filas] [repeticiones]
+
+No necesita base de datos: construye instancias ORM transitorias.
+"""
+import os
+import sys
+import asyncio
+import timeit
+from datetime import date, datetime
+from typing import List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DATABASE_URI", "sqlite://")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.core.responses import orm_response
+from app.models import Producto, Trabajo, Venta, DetalleVenta, Gasto, Usuario
+from app.schemas.producto import ProductoResponse, ProductoListAdapter
+from app.schemas.trabajo import TrabajoResponse, TrabajoListAdapter
+from app.schemas.venta import VentaResponse, VentaListAdapter
+from app.schemas.usuario import UsuarioResponse, UsuarioListAdapter
+from app.schemas.gasto import GastoResponse, GastoListAdapter
+
+
+def build_rows(n: int) -> dict:
+    now = datetime(2024, 1, 1, 12, 0)
+    return {
+        "listar_productos": (ProductoResponse, ProductoListAdapter, [
+            Producto(id=i, nombre=f"Producto {i}", descripcion="Descripción " * 20, precio=10.5 + i,
+                     stock=i, foto=None, categoria="Repuestos", destacado=bool(i % 2))
+            for i in range(n)
+        ]),
+        "listar_trabajos": (TrabajoResponse, TrabajoListAdapter, [
+            Trabajo(id=i, descripcion=f"Cambio de aceite {i}", estado="pendiente", foto=None,
+                    fecha_creacion=now, costo=50.0, fecha_cancelacion=None, mecanico_id=1, cliente_id=2)
+            for i in range(n)
+        ]),
+        "listar_ventas": (VentaResponse, VentaListAdapter, [
+            Venta(id=i, fecha=now, total=100.0, cliente_id=2, vendedor_id=1, trabajo_id=None, detalles=[
+                DetalleVenta(id=i * 10 + j, cantidad=2, precio_unitario=25.0, subtotal=50.0,
+                             descripcion="Filtro", venta_id=i, producto_id=j)
+                for j in range(5)
+            ])
+            for i in range(n)
+        ]),
+        "listar_usuarios": (UsuarioResponse, UsuarioListAdapter, [
+            Usuario(id=i, correo=f"user{i}@example.com", nombre=f"Usuario {i}", rol="usuario", imagen=None)
+            for i in range(n)
+        ]),
+        "listar_gastos": (GastoResponse, GastoListAdapter, [
+            Gasto(id=i, descripcion="Arriendo", monto=300.0, categoria="Local", fecha=date(2024, 1, 1), creado_en=now)
+            for i in range(n)
+        ]),
+    }
+
+
+def main() -> None:
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    loop = asyncio.new_event_loop()
+    print(f"{'endpoint':<18} {'actual (ms)':>12} {'orjson (ms)':>12} {'rápida (ms)':>12} {'mejora':>8}")
+    for endpoint, (schema, adapter, rows) in build_rows(n).items():
+        field = create_response_field(name="response", type_=List[schema])
+
+        def actual(response_class=JSONResponse):
+            content = loop.run_until_complete(serialize_response(field=field, response_content=rows))
+            return response_class(content).body
+
+        def rapida():
+            return orm_response(adapter, rows).body
+
+        t_actual = min(timeit.repeat(actual, number=repeat, repeat=3)) / repeat * 1000
+        t_orjson = min(timeit.repeat(lambda: actual(ORJSONResponse), number=repeat, repeat=3)) / repeat * 1000
+        t_rapida = min(timeit.repeat(rapida, number=repeat, repeat=3)) / repeat * 1000
+        print(f"{endpoint:<18} {t_actual:>12.3f} {t_orjson:>12.3f} {t_rapida:>12.3f} {t_actual / t_rapida:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
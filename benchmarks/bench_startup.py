@@ -0,0 +1,108 @@
+"""
+Benchmark de arranque: perfil de tiempo de importación de main y tiempo desde
+el arranque en frío del proceso hasta el primer 200 de un endpoint con base de
+datos, con y sin calentamiento (WARMUP_ENABLED).
+
+Uso:
+    python benchmarks/bench_startup.py [repeticiones]
+
+Usa DATABASE_URI si está definida; si no, una base SQLite temporal con las tablas creadas.
+"""
+import os
+import sys
+import time
+import socket
+import tempfile
+import statistics
+import subprocess
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+URL_PATH = "/api/v1/productos/"
+
+
+def base_env() -> dict:
+    env = dict(os.environ)
+    env.setdefault("SECRET_KEY", "benchmark")
+    if "DATABASE_URI" not in env:
+        path = os.path.join(tempfile.mkdtemp(), "bench.db")
+        env["DATABASE_URI"] = f"sqlite:///{path}"
+        subprocess.run(
+            [sys.executable, "-c", "from app.models import Base; from app.core.database import engine; "
+                                   "Base.metadata.create_all(engine)"],
+            cwd=ROOT, env=env, check=True,
+        )
+    env.setdefault("CATALOG_VERSION_FILE", os.path.join(tempfile.mkdtemp(), "catalogo.version"))
+    env["UPLOAD_GC_INTERVAL"] = "0"
+    return env
+
+
+def import_profile(env: dict, top: int = 15) -> None:
+    """Módulos con mayor tiempo acumulado de importación (python -X importtime)"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, self_us, cumulative_us, name = [p.strip() for p in line.replace("import time:", "|").split("|")]
+        if self_us.isdigit():
+            rows.append((int(cumulative_us), int(self_us), name))
+
+    total = next((c for c, _, n in rows if n == "main"), 0)
+    print(f"Importación de main: {total / 1000:.1f} ms")
+    print(f"{'acumulado (ms)':>15} {'propio (ms)':>12}  módulo")
+    for cumulative, own, name in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative / 1000:>15.1f} {own / 1000:>12.1f}  {name}")
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def cold_start(env: dict) -> tuple:
+    """(ms hasta el primer 200, ms del primer request) para un proceso nuevo"""
+    port = free_port()
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            request_start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{URL_PATH}", timeout=10) as response:
+                    if response.status == 200:
+                        now = time.perf_counter()
+                        return (now - start) * 1000, (now - request_start) * 1000
+            except OSError:
+                time.sleep(0.02)
+            if time.perf_counter() - start > 60:
+                raise RuntimeError("El servidor no respondió en 60 s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main() -> None:
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    env = base_env()
+
+    import_profile(env)
+
+    print(f"\nArranque en frío hasta el primer 200 de {URL_PATH} ({repeat} repeticiones)")
+    print(f"{'calentamiento':<14} {'hasta 200 (ms)':>15} {'primer request (ms)':>20}")
+    for warmup in ("0", "1"):
+        runs = [cold_start({**env, "WARMUP_ENABLED": warmup}) for _ in range(repeat)]
+        total = statistics.median(r[0] for r in runs)
+        first = statistics.median(r[1] for r in runs)
+        print(f"{'sí' if warmup == '1' else 'no':<14} {total:>15.1f} {first:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Prueba de concurrencia del descuento de stock: muchos hilos venden a la vez
+el mismo producto y se comprueba que no se sobrevende (ventas aceptadas ==
+stock inicial y stock final == 0).
+
+Uso:
+    python benchmarks/bench_stock_concurrency.py [hilos] [ventas_por_hilo] [stock]
+
+Usa DATABASE_URI si está definida; si no, una base SQLite temporal.
+"""
+import os
+import sys
+import time
+import tempfile
+import threading
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("SECRET_KEY", "benchmark")
+os.environ.setdefault("DATABASE_URI", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'bench.db')}")
+
+from sqlalchemy.exc import OperationalError  # noqa: E402
+
+from app.core.database import SessionLocal, engine  # noqa: E402
+from app.models import Base, Producto  # noqa: E402
+from app.utils.stock import descontar_stock  # noqa: E402
+
+
+def vender(producto_id: int, ventas: int, resultados: list) -> None:
+    aceptadas = rechazadas = 0
+    for _ in range(ventas):
+        db = SessionLocal()
+        try:
+            while True:
+                try:
+                    if descontar_stock(db, {producto_id: 1}):
+                        db.commit()
+                        aceptadas += 1
+                    else:
+                        db.rollback()
+                        rechazadas += 1
+                    break
+                except OperationalError:
+                    # SQLite bloqueada por otro escritor: reintentar
+                    db.rollback()
+        finally:
+            db.close()
+    resultados.append((aceptadas, rechazadas))
+
+
+def main() -> None:
+    hilos = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    ventas = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    stock = int(sys.argv[3]) if len(sys.argv) > 3 else 300
+
+    Base.metadata.create_all(engine)
+    db = SessionLocal()
+    producto = Producto(nombre="bench-stock", precio=1, stock=stock)
+    db.add(producto)
+    db.commit()
+    producto_id = producto.id
+    db.close()
+
+    resultados: list = []
+    workers = [threading.Thread(target=vender, args=(producto_id, ventas, resultados)) for _ in range(hilos)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - start
+
+    db = SessionLocal()
+    final = db.get(Producto, producto_id).stock
+    db.delete(db.get(Producto, producto_id))
+    db.commit()
+    db.close()
+
+    aceptadas = sum(r[0] for r in resultados)
+    rechazadas = sum(r[1] for r in resultados)
+    print(f"{hilos} hilos x {ventas} ventas sobre stock {stock} en {elapsed:.2f} s")
+    print(f"aceptadas={aceptadas} rechazadas={rechazadas} stock_final={final}")
+
+    esperadas = min(stock, hilos * ventas)
+    if aceptadas != esperadas or final != stock - esperadas:
+        print("ERROR: sobreventa o stock inconsistente")
+        sys.exit(1)
+    print("OK: sin sobreventa")
+
+
+if __name__ == "__main__":
+    main()
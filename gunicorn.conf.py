@@ -0,0 +1,63 @@
+# Configuración de producción: gunicorn -c gunicorn.conf.py main:app
+import os
+import shutil
+
+from prometheus_client import multiprocess
+
+
+def _cpu_count() -> int:
+    # Respeta los CPUs asignados al contenedor (cpuset)
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8055')}"
+workers = int(os.getenv("WEB_CONCURRENCY", _cpu_count()))
+worker_class = "app.core.server.ProductionUvicornWorker"
+
+# Reciclar workers cada N peticiones (con jitter para no reiniciarlos a la vez)
+max_requests = int(os.getenv("MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("MAX_REQUESTS_JITTER", "1000"))
+
+# Reinicio ordenado: kill -HUP recarga workers sin cortar conexiones
+graceful_timeout = int(os.getenv("GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("WORKER_TIMEOUT", "60"))
+keepalive = int(os.getenv("KEEPALIVE", "5"))
+
+accesslog = "-" if os.getenv("ACCESS_LOG", "0") == "1" else None
+errorlog = "-"
+
+# Pool de conexiones por worker: DB_MAX_CONNECTIONS se reparte entre workers
+# para no superar el límite del servidor MySQL
+if os.getenv("DB_MAX_CONNECTIONS"):
+    per_worker = max(int(os.environ["DB_MAX_CONNECTIONS"]) // workers, 1)
+    os.environ.setdefault("DB_POOL_SIZE", str(per_worker))
+    os.environ.setdefault("DB_MAX_OVERFLOW", "0")
+
+
+def on_starting(server):
+    # Métricas multiproceso: empezar con el directorio limpio
+    prometheus_dir = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if prometheus_dir:
+        shutil.rmtree(prometheus_dir, ignore_errors=True)
+        os.makedirs(prometheus_dir, exist_ok=True)
+
+    # Índices que falten en tablas existentes: una sola vez, en el maestro y
+    # antes de arrancar workers (en un worker superaría el timeout de gunicorn)
+    if os.getenv("DB_CREATE_INDEXES", "1") == "1":
+        import app.models  # noqa: F401 (registra todas las tablas)
+        from app.core.database import create_missing_indexes, create_missing_tables, engine
+
+        create_missing_tables()
+        created = create_missing_indexes()
+        if created:
+            server.log.info("Índices creados: %s", ", ".join(created))
+        # Los workers abren sus propias conexiones tras el fork
+        engine.dispose()
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,28 +1,52 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-import uvicorn
+import asyncio
+from fastapi.concurrency import run_in_threadpool
 
 from app.core.config import settings
-from app.core.database import engine
-from app.models import Base
+from app.core.compression import CompressionMiddleware
+from app.core.warmup import warm_up
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.database import create_missing_tables
+from app.core.jobs import job_runner
 from app.api.v1 import api_router
+from app.api.media import router as media_router
+from app.utils.uploads import run_upload_gc_periodically
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     print("🚀 Iniciando FastAPI Backend para Taller Mecánico...")
+    # Tablas nuevas (p. ej. tarea). Los índices de tablas existentes se crean
+    # aparte, una vez por despliegue (ver app.core.database)
+    await run_in_threadpool(create_missing_tables)
+    if settings.WARMUP_ENABLED:
+        # Conexiones, SQL compilado, caché del catálogo y bcrypt/JWT antes del primer request
+        timings = await run_in_threadpool(warm_up)
+        print(f"🔥 Calentamiento (ms): {timings}")
+    upload_gc = None
+    if settings.UPLOAD_GC_INTERVAL > 0:
+        upload_gc = asyncio.create_task(run_upload_gc_periodically())
+    if settings.JOBS_ENABLED:
+        await job_runner.start()
     yield
     # Shutdown
     print("👋 Cerrando aplicación...")
+    if upload_gc:
+        upload_gc.cancel()
+    # Las tareas interrumpidas quedan en la tabla y se reintentan
+    await job_runner.stop()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     version=settings.VERSION,
     description="Backend API para sistema de taller mecánico - Migrado desde Flask",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # CORS
@@ -34,8 +58,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compresión de respuestas
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+        gzip_level=settings.COMPRESSION_LEVEL,
+        content_types=settings.COMPRESSION_CONTENT_TYPES,
+        brotli_enabled=settings.COMPRESSION_BROTLI,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
+
+# Métricas (el último middleware añadido es el más externo: mide todo)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 # Incluir routers
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(media_router, tags=["Media"])
 
 
 @app.get("/", tags=["Health"])
@@ -53,7 +93,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+async def metrics():
+    return metrics_response()
+
+
+# Desarrollo. En producción: gunicorn -c gunicorn.conf.py main:app
 if __name__ == "__main__":
+    # uvicorn solo se importa aquí: los workers de producción no lo necesitan en main
+    import uvicorn
+
     uvicorn.run(
         "main:app",
         host="0.0.0.0",